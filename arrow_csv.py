@@ -0,0 +1,34 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+
+# Cells may contain line breaks inside quotes (e.g. multi-line manufacturer entries)
+PARSE_OPTIONS = pv.ParseOptions(newlines_in_values=True)
+
+def read_string_table(file_path, keep):
+    """
+    Reads the columns of a CSV file whose header name satisfies keep(name) into a
+    pyarrow Table, with every column as text (empty cells and 'N/A'-style markers
+    become nulls, as with pd.read_csv). The file is parsed by pyarrow's
+    multi-threaded reader; columns that are not kept are skipped while parsing.
+    """
+    # Only the header is needed to decide which columns exist in this file
+    header = pv.open_csv(file_path, parse_options=PARSE_OPTIONS).schema.names
+    columns = [name for name in dict.fromkeys(header) if keep(name)]
+    return pv.read_csv(
+        file_path,
+        parse_options=PARSE_OPTIONS,
+        convert_options=pv.ConvertOptions(
+            include_columns=columns,
+            column_types={name: pa.string() for name in columns},
+            strings_can_be_null=True,
+        ),
+    )
+
+def table_to_frame(table):
+    """Converts a Table from read_string_table to a DataFrame of Arrow-backed strings."""
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+
+def read_string_columns(file_path, keep):
+    """Reads the kept columns of a CSV file into a DataFrame of Arrow-backed strings."""
+    return table_to_frame(read_string_table(file_path, keep))
@@ -1,6 +1,7 @@
 import pandas as pd
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor, wait
 
 # ==============================================================================
 # --- CONFIGURATION (ADJUST FOLDER NAMES HERE) ---
@@ -8,6 +9,7 @@ import shutil
 folder_name_1 = '1996'  # Replace with your first source folder name
 folder_name_2 = '2024'  # Replace with your second source folder name
 target_folder_name = 'final_pictures'  # Replace with your desired target folder name
+copy_workers = 16  # Number of files copied in parallel
 # --- END OF CONFIGURATION ---
 
 # Automatic path setup based on the script's current directory
@@ -33,8 +35,9 @@ if not os.path.exists(target_folder):
 # A set is used to store unique identifiers, automatically handling deduplication
 object_identifiers = set()
 try:
-    # Read the CSV, skipping malformed lines
-    df = pd.read_csv(csv_filepath, on_bad_lines='skip')
+    # Read the CSV, skipping malformed lines; only the 'T13' column is needed,
+    # loaded as Arrow-backed strings
+    df = pd.read_csv(csv_filepath, on_bad_lines='skip', usecols=lambda c: c == 'T13', dtype="string[pyarrow]")
     
     # The column 'T13' is assumed to contain file paths/names
     if 'T13' not in df.columns:
@@ -76,29 +79,45 @@ found_images_counter = 0
 # A set to prevent copying the same file name multiple times (if it exists in both source folders)
 copied_files = set() 
 
+# Identifiers are matched by slicing the file name to each identifier length that
+# occurs and looking the prefix up in the set, instead of testing every identifier
+identifier_lengths = sorted({len(identifier) for identifier in object_identifiers})
+
 print("Starting copy operation...")
-# Iterate over both configured source folders
-for source_folder in [source_folder_1, source_folder_2]:
-    # Iterate over all files/folders in the source directory
-    for file_name in os.listdir(source_folder):
-        file_name_lower = file_name.lower()
-        
-        # Check if the file name starts with any of the required identifiers
-        for identifier in object_identifiers:
-            if file_name_lower.startswith(identifier):
-                # Ensure the file hasn't been copied already
-                if file_name not in copied_files:
-                    source_path = os.path.join(source_folder, file_name)
+# The copies are I/O-bound, so they are handed to a thread pool and overlap each other
+copy_futures = []
+with ThreadPoolExecutor(max_workers=copy_workers) as executor:
+    # Iterate over both configured source folders
+    for source_folder in [source_folder_1, source_folder_2]:
+        # Iterate over all files/folders in the source directory; scandir provides the
+        # file type without an extra stat call per entry
+        with os.scandir(source_folder) as entries:
+            for entry in entries:
+                file_name = entry.name
+                # Skip files that were already copied from another source folder
+                if file_name in copied_files:
+                    continue
+
+                file_name_lower = file_name.lower()
+                # Check if the file name starts with any of the required identifiers
+                if not any(file_name_lower[:length] in object_identifiers for length in identifier_lengths):
+                    continue
+
+                # Verify it is actually a file before attempting to copy
+                if entry.is_file():
                     target_path = os.path.join(target_folder, file_name)
-                    
-                    # Verify it is actually a file before attempting to copy
-                    if os.path.isfile(source_path):
-                        # Use shutil.copy2 to preserve metadata (timestamps, etc.)
-                        shutil.copy2(source_path, target_path)
-                        found_images_counter += 1
-                        copied_files.add(file_name)
-                        # Break the identifier loop once a match is found for the current file
-                        break 
+                    # Use shutil.copy2 to preserve metadata (timestamps, etc.)
+                    copy_futures.append(executor.submit(shutil.copy2, entry.path, target_path))
+                    copied_files.add(file_name)
+
+    # Wait for all pending copies before counting them
+    wait(copy_futures)
+
+for future in copy_futures:
+    if future.exception() is None:
+        found_images_counter += 1
+    else:
+        print(f"❌ ERROR: Copy failed: {future.exception()}")
 
 # ==============================================================================
 # Step 3: Summary
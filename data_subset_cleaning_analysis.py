@@ -1,31 +1,16 @@
 import pandas as pd
-import numpy as np
 import re
+import matplotlib
+# The charts are only saved to files, so the non-interactive Agg backend is used
+# (skips probing for a GUI backend).
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+from arrow_csv import read_string_columns
 
 # ==============================================================================
 # 1. Data Loading and Subsetting
 # ==============================================================================
 
-# Loads the two source CSV files (which appear to be Excel exports)
-# into separate Pandas DataFrames.
-df1 = pd.read_csv('Liste1.xls - CSV-Export.csv')
-df2 = pd.read_csv('Liste2.xls - CSV-Export.csv')
-
-# --- Data Subsetting and Merging ---
-
-# Selects specific row ranges from the loaded DataFrames.
-# df1: Rows 601-900 (corresponds to 0-based index positions 600 to 899).
-df1_subset = df1.iloc[600:900]
-# df2: Rows 501-1000 (corresponds to 0-based index positions 500 to 999).
-df2_subset = df2.iloc[500:1000]
-
-# Concatenates the two subsets vertically.
-# 'ignore_index=True' ensures the new DataFrame has a continuous index.
-df = pd.concat([df1_subset, df2_subset], ignore_index=True)
-
-# --- Data Cleaning and Preprocessing Setup ---
-
 # Defines the relevant source columns (e.g., t1, T2) and
 # maps them to clearer, descriptive target names.
 relevant_columns = {
@@ -40,76 +25,102 @@ relevant_columns = {
     'T14': 'Year'
 }
 
-# Filters the DataFrame to only include columns that actually exist in the source data.
+# Loads the two source CSV files (which appear to be Excel exports)
+# into separate Pandas DataFrames. Only the relevant columns are parsed
+# (columns missing from a file are simply skipped). All columns are text,
+# so they are read as Arrow-backed strings: about half the memory of Python str objects.
+# pyarrow's multi-threaded CSV reader parses the files straight into Arrow columns.
+df1 = read_string_columns('Liste1.xls - CSV-Export.csv', lambda c: c in relevant_columns)
+df2 = read_string_columns('Liste2.xls - CSV-Export.csv', lambda c: c in relevant_columns)
+
+# --- Data Subsetting and Merging ---
+
+# Selects specific row ranges from the loaded DataFrames and concatenates
+# them vertically in one step:
+# df1: Rows 601-900 (corresponds to 0-based index positions 600 to 899).
+# df2: Rows 501-1000 (corresponds to 0-based index positions 500 to 999).
+# 'ignore_index=True' ensures the new DataFrame has a continuous index.
+df = pd.concat([df1.iloc[600:900], df2.iloc[500:1000]], ignore_index=True)
+
+# --- Data Cleaning and Preprocessing Setup ---
+
+# Keeps only the relevant columns that actually exist in the source data (in the order above).
 # This prevents errors if one of the expected source columns is missing.
-existing_columns = {k: v for k, v in relevant_columns.items() if k in df.columns}
-df_filtered = df[list(existing_columns.keys())].copy()
+source_columns = frozenset(df.columns)
+existing_columns = {k: v for k, v in relevant_columns.items() if k in source_columns}
 
 # Renames the selected columns to their clearer names.
-df_filtered.rename(columns=existing_columns, inplace=True)
+df_filtered = df[list(existing_columns.keys())].rename(columns=existing_columns)
 
 # ==============================================================================
 # 2. Data Cleaning Functions
 # ==============================================================================
 
-def clean_year(year_str):
+# Regex patterns are compiled once here instead of being looked up in re's
+# internal cache on every call (the functions below run once per row).
+_YEAR_RE = re.compile(r'\b(\d{4})\b')
+_MASS_RE = re.compile(r'Masse:\s*([\d,\.]+)\s*kg', re.IGNORECASE)
+_HBT_H_RE = re.compile(r'HxBxT:\s*([\d,\.]+) x', re.IGNORECASE)
+_HBT_W_RE = re.compile(r'x\s*([\d,\.]+) x', re.IGNORECASE)
+_HBT_D_RE = re.compile(r'x\s*([\d,\.]+)\s*mm', re.IGNORECASE)
+_LBH_H_RE = re.compile(r'LxBxH:\s*[\d,\.]+ x [\d,\.]+ x ([\d,\.]+)\s*mm', re.IGNORECASE)
+_LBH_W_RE = re.compile(r'LxBxH:\s*[\d,\.]+ x ([\d,\.]+) x', re.IGNORECASE)
+_LBH_D_RE = re.compile(r'LxBxH:\s*([\d,\.]+) x', re.IGNORECASE)
+
+def clean_year(years):
     """
-    Extracts the first 4-digit year found in a string (e.g., '1985' from 'ca. 1985').
+    Extracts the first 4-digit year found in each string of the column (e.g., '1985' from 'ca. 1985').
     """
-    if isinstance(year_str, str):
-        # Finds a 4-digit number surrounded by word boundaries (e.g., '2023').
-        years = re.findall(r'\b\d{4}\b', year_str)
-        if years:
-            # Returns the first found year as an integer.
-            return int(years[0])
-    # Returns NaN (Not a Number) if no year is found or the value isn't a string.
-    return np.nan
+    # Finds the first 4-digit number surrounded by word boundaries (e.g., '2023') in every row at once.
+    # Rows without a year (or without a string) become NaN (Not a Number).
+    return pd.to_numeric(years.astype("string").str.extract(_YEAR_RE, expand=False), errors='coerce').astype(float)
 
 # Applies the cleaning function to the 'Year' column and stores the result
 # in a new, clean column 'Year_Cleaned'.
-df_filtered['Year_Cleaned'] = df_filtered['Year'].apply(clean_year)
+df_filtered['Year_Cleaned'] = clean_year(df_filtered['Year'])
 
 
-def extract_dimensions(dim_str):
+def _extract_number(dimensions, pattern):
+    """
+    Extracts the first group of the pattern from every string in the column and
+    converts it to float (decimal commas become periods). Non-matches become NaN.
+    """
+    numbers = dimensions.str.extract(pattern, expand=False).str.replace(',', '.', regex=False)
+    # Malformed numbers (e.g., '1.2.3') become NaN instead of aborting the run
+    return pd.to_numeric(numbers, errors='coerce').astype(float)
+
+def extract_dimensions(dimensions):
     """
     Extracts Mass (kg), Height (H), Width (W), and Depth (D) (or Length/Depth)
-    from the 'Dimensions' string using specific regex patterns (HxBxT, LxBxH).
+    from the 'Dimensions' column using specific regex patterns (HxBxT, LxBxH).
+    Each pattern runs over the whole column at once instead of row by row.
     """
-    # Returns four NaN values if the input is not a string.
-    if not isinstance(dim_str, str):
-        return pd.Series([np.nan, np.nan, np.nan, np.nan], index=['Mass_kg', 'Height_mm', 'Width_mm', 'Depth_mm'])
+    # Non-string entries (e.g., missing values) yield NaN in every column.
+    dimensions = dimensions.astype("string")
 
     # Pattern 1: Extract Mass (kg)
     # Searches for 'Masse:' followed by a number (with comma or period) and 'kg'.
-    mass_match = re.search(r'Masse:\s*([\d,\.]+)\s*kg', dim_str, re.IGNORECASE)
-    # Converts to float, replacing commas with periods, or sets to NaN if not found.
-    mass = float(mass_match.group(1).replace(',', '.')) if mass_match else np.nan
+    mass = _extract_number(dimensions, _MASS_RE)
 
     # Pattern 2: Extract HxBxT (Height, Width, Depth) in mm
-    h_match = re.search(r'HxBxT:\s*([\d,\.]+) x', dim_str, re.IGNORECASE)
-    w_match = re.search(r'x\s*([\d,\.]+) x', dim_str, re.IGNORECASE)
-    d_match = re.search(r'x\s*([\d,\.]+)\s*mm', dim_str, re.IGNORECASE)
+    height = _extract_number(dimensions, _HBT_H_RE)
+    width = _extract_number(dimensions, _HBT_W_RE)
+    depth = _extract_number(dimensions, _HBT_D_RE)
 
-    height = float(h_match.group(1).replace(',', '.')) if h_match else np.nan
-    width = float(w_match.group(1).replace(',', '.')) if w_match else np.nan
-    depth = float(d_match.group(1).replace(',', '.')) if d_match else np.nan
-
-    # Pattern 3: Tries LxBxH (Length, Width, Height) if HxBxT failed
-    if pd.isna(height) and pd.isna(width) and pd.isna(depth):
+    # Pattern 3: Tries LxBxH (Length, Width, Height) on the rows where HxBxT failed
+    hbt_failed = height.isna() & width.isna() & depth.isna()
+    if hbt_failed.any():
         # In LxBxH, L is often interpreted as Depth, B as Width, and H as Height.
-        h_match_lbh = re.search(r'LxBxH:\s*[\d,\.]+ x [\d,\.]+ x ([\d,\.]+)\s*mm', dim_str, re.IGNORECASE)
-        w_match_lbh = re.search(r'LxBxH:\s*[\d,\.]+ x ([\d,\.]+) x', dim_str, re.IGNORECASE)
-        d_match_lbh = re.search(r'LxBxH:\s*([\d,\.]+) x', dim_str, re.IGNORECASE)
-
-        height = float(h_match_lbh.group(1).replace(',', '.')) if h_match_lbh else height
-        width = float(w_match_lbh.group(1).replace(',', '.')) if w_match_lbh else width
-        depth = float(d_match_lbh.group(1).replace(',', '.')) if d_match_lbh else depth
+        lbh = dimensions[hbt_failed]
+        height = height.fillna(_extract_number(lbh, _LBH_H_RE))
+        width = width.fillna(_extract_number(lbh, _LBH_W_RE))
+        depth = depth.fillna(_extract_number(lbh, _LBH_D_RE))
 
-    # Returns the extracted values as a Pandas Series to be added as separate columns.
-    return pd.Series([mass, height, width, depth], index=['Mass_kg', 'Height_mm', 'Width_mm', 'Depth_mm'])
+    # Returns the extracted values as a DataFrame to be added as separate columns.
+    return pd.DataFrame({'Mass_kg': mass, 'Height_mm': height, 'Width_mm': width, 'Depth_mm': depth})
 
-# Applies the dimension extraction function and adds the new numerical columns.
-df_filtered[['Mass_kg', 'Height_mm', 'Width_mm', 'Depth_mm']] = df_filtered['Dimensions'].apply(extract_dimensions)
+# Applies the dimension extraction to the whole column and adds the new numerical columns.
+df_filtered[['Mass_kg', 'Height_mm', 'Width_mm', 'Depth_mm']] = extract_dimensions(df_filtered['Dimensions'])
 
 # ==============================================================================
 # 3. Exploratory Data Analysis (EDA) & Visualization
@@ -119,37 +130,45 @@ df_filtered[['Mass_kg', 'Height_mm', 'Width_mm', 'Depth_mm']] = df_filtered['Dim
 # for a consistent count.
 df_filtered['Manufacturer_Cleaned'] = df_filtered['Manufacturer'].astype(str).str.split('\n').str[0]
 
+# One figure is reused for all charts: each chart clears the axes and is saved
+# before the next one is drawn.
+fig, ax = plt.subplots(figsize=(10, 6))
+
 # --- 3.1 Year Distribution ---
-plt.figure(figsize=(10, 6))
 # Creates a histogram of the cleaned year data, dropping NaN values.
-df_filtered['Year_Cleaned'].dropna().hist(bins=30, edgecolor='black')
-plt.title('Distribution of Manufacturing Years (New Subset)')
-plt.xlabel('Year')
-plt.ylabel('Number of Objects')
-plt.grid(False)
+df_filtered['Year_Cleaned'].dropna().hist(bins=30, edgecolor='black', ax=ax)
+ax.set_title('Distribution of Manufacturing Years (New Subset)')
+ax.set_xlabel('Year')
+ax.set_ylabel('Number of Objects')
+ax.grid(False)
 # Saves the chart as an image file.
-plt.savefig('year_distribution_new.png')
+fig.savefig('year_distribution_new.png')
 
 # --- 3.2 Top 10 Manufacturers ---
-plt.figure(figsize=(12, 8))
+ax.cla()
+fig.set_size_inches(12, 8)
 # Counts the occurrences of the cleaned manufacturers and selects the top 10.
 top_manufacturers = df_filtered['Manufacturer_Cleaned'].value_counts().nlargest(10)
 # Creates a horizontal bar chart, sorting values for better readability.
-top_manufacturers.sort_values().plot(kind='barh')
-plt.title('Top 10 Manufacturers by Number of Objects (New Subset)')
-plt.xlabel('Number of Objects')
-plt.ylabel('Manufacturer')
-plt.tight_layout() # Adjusts margins to prevent labels from being cut off.
-plt.savefig('top_manufacturers_new.png')
+top_manufacturers.sort_values().plot(kind='barh', ax=ax)
+ax.set_title('Top 10 Manufacturers by Number of Objects (New Subset)')
+ax.set_xlabel('Number of Objects')
+ax.set_ylabel('Manufacturer')
+fig.tight_layout() # Adjusts margins to prevent labels from being cut off.
+fig.savefig('top_manufacturers_new.png')
 
 # --- 3.3 Mass Distribution ---
-plt.figure(figsize=(10, 6))
+ax.cla()
+fig.set_size_inches(10, 6)
 # Creates a histogram of the cleaned mass values.
-df_filtered['Mass_kg'].dropna().hist(bins=30, edgecolor='black')
-plt.title('Distribution of Object Mass (kg) (New Subset)')
-plt.xlabel('Mass (kg)')
-plt.ylabel('Frequency')
-plt.savefig('mass_distribution_new.png')
+df_filtered['Mass_kg'].dropna().hist(bins=30, edgecolor='black', ax=ax)
+ax.set_title('Distribution of Object Mass (kg) (New Subset)')
+ax.set_xlabel('Mass (kg)')
+ax.set_ylabel('Frequency')
+# Recomputes the margins, which still fit the manufacturer labels of the previous chart.
+fig.tight_layout()
+fig.savefig('mass_distribution_new.png')
+plt.close(fig)
 
 # ==============================================================================
 # 4. Save Processed Data
@@ -163,7 +182,8 @@ final_columns = [
 ]
 
 # Ensures only columns that exist in the processed DataFrame are selected.
-final_columns_exist = [col for col in final_columns if col in df_filtered.columns]
+processed_columns = frozenset(df_filtered.columns)
+final_columns_exist = [col for col in final_columns if col in processed_columns]
 processed_df = df_filtered[final_columns_exist]
 
 # Saves the cleaned and augmented DataFrame to a new CSV file.
@@ -2,6 +2,13 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import re
+from arrow_csv import read_string_columns
+
+# Columns used by the analysis (ID, material, date)
+ANALYSIS_COLUMNS = {'t1', 't3', 't14'}
+
+# First 4-digit year in a date string (compiled once, used for every row)
+_YEAR_RE = re.compile(r'\b(\d{4})\b')
 
 def analyze_and_categorize_collection(file_path):
     """
@@ -12,7 +19,8 @@ def analyze_and_categorize_collection(file_path):
 
     # --- 1. Load and Clean Data ---
     try:
-        df = pd.read_csv(file_path, dtype=str).fillna("N/A")
+        # Only the ID, material and date columns are parsed (matched like the standardized names below)
+        df = read_string_columns(file_path, lambda c: c.strip().lower() in ANALYSIS_COLUMNS).fillna("N/A")
         # Standardize column names
         df.columns = df.columns.str.strip().str.lower()
     except FileNotFoundError:
@@ -24,7 +32,17 @@ def analyze_and_categorize_collection(file_path):
     df['lookup_key'] = df['t1'].str.strip().str.replace('/', '-', regex=False).str.split(' ').str[0]
     
     # Create a DataFrame containing only the unique objects (first entry for each ID)
-    unique_objects_df = df.drop_duplicates(subset='lookup_key', keep='first')
+    # and add both category columns in the same step (vectorized, no per-row Python calls):
+    # - material_category: the first listed material, capitalized
+    # - decade_category: the decade of the first 4-digit year (e.g., 1940 -> "1940s"), else "Unknown"
+    unique_objects_df = df.drop_duplicates(subset='lookup_key', keep='first').assign(
+        material_category=lambda d: d['t3'].str.split(r'[,;]', regex=True).str[0].str.strip().str.capitalize(),
+        decade_category=lambda d: (
+            (pd.to_numeric(d['t14'].str.extract(_YEAR_RE, expand=False)) // 10 * 10)
+            .astype('Int64').astype('string').add('s')
+            .fillna('Unknown').astype(str)
+        ),
+    )
     unique_object_count = len(unique_objects_df)
 
     print("\n" + "="*50)
@@ -37,9 +55,7 @@ def analyze_and_categorize_collection(file_path):
     # --- 3. Create Categories ---
     
     # --- Category 1: By Primary Material ---
-    # Extract the first listed material and capitalize it
-    unique_objects_df['material_category'] = unique_objects_df['t3'].str.split(r'[,;]').str[0].str.strip().str.capitalize()
-    material_counts = unique_objects_df['material_category'].value_counts().nlargest(10)
+    material_counts = unique_objects_df['material_category'].value_counts(sort=False).nlargest(10)
 
     print("\n" + "="*50)
     print("      Categorization by Primary Material (Top 10)")
@@ -48,30 +64,22 @@ def analyze_and_categorize_collection(file_path):
     print("="*50)
 
     # Visualization for Material
-    plt.figure(figsize=(12, 8))
-    sns.barplot(x=material_counts.values, y=material_counts.index, palette="crest")
-    plt.title('Top 10 Material Categories', fontsize=16)
-    plt.xlabel('Number of Unique Objects', fontsize=12)
-    plt.ylabel('Material', fontsize=12)
-    plt.tight_layout()
-    materials_chart_path = 'category_by_material.png'
-    plt.savefig(materials_chart_path)
+    fig = plt.figure(figsize=(12, 8))
+    try:
+        sns.barplot(x=material_counts.values, y=material_counts.index, palette="crest")
+        plt.title('Top 10 Material Categories', fontsize=16)
+        plt.xlabel('Number of Unique Objects', fontsize=12)
+        plt.ylabel('Material', fontsize=12)
+        plt.tight_layout()
+        materials_chart_path = 'category_by_material.png'
+        plt.savefig(materials_chart_path)
+    finally:
+        plt.close(fig)
     print(f"\n✅ Chart for material categories saved to '{materials_chart_path}'")
 
 
     # --- Category 2: By Decade ---
-    def get_decade(date_string):
-        if not isinstance(date_string, str): return "Unknown"
-        # Find the first 4-digit year
-        match = re.search(r'\b(\d{4})\b', date_string)
-        if match:
-            year = int(match.group(1))
-            # Create decade string (e.g., 1940 -> "1940s")
-            return f"{(year // 10) * 10}s"
-        return "Unknown"
-
-    unique_objects_df['decade_category'] = unique_objects_df['t14'].apply(get_decade)
-    decade_counts = unique_objects_df['decade_category'].value_counts().nlargest(15)
+    decade_counts = unique_objects_df['decade_category'].value_counts(sort=False).nlargest(15)
     # Exclude 'Unknown' from the top list if it's there, unless it's the only category
     if "Unknown" in decade_counts.index and len(decade_counts) > 1:
         decade_counts = decade_counts.drop("Unknown")
@@ -85,15 +93,18 @@ def analyze_and_categorize_collection(file_path):
     print("="*50)
 
     # Visualization for Decade
-    plt.figure(figsize=(14, 7))
-    sns.barplot(x=decade_counts.index, y=decade_counts.values, palette="magma")
-    plt.title('Object Distribution by Decade', fontsize=16)
-    plt.xlabel('Decade', fontsize=12)
-    plt.ylabel('Number of Unique Objects', fontsize=12)
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    decades_chart_path = 'category_by_decade.png'
-    plt.savefig(decades_chart_path)
+    fig = plt.figure(figsize=(14, 7))
+    try:
+        sns.barplot(x=decade_counts.index, y=decade_counts.values, palette="magma")
+        plt.title('Object Distribution by Decade', fontsize=16)
+        plt.xlabel('Decade', fontsize=12)
+        plt.ylabel('Number of Unique Objects', fontsize=12)
+        plt.xticks(rotation=45, ha='right')
+        plt.tight_layout()
+        decades_chart_path = 'category_by_decade.png'
+        plt.savefig(decades_chart_path)
+    finally:
+        plt.close(fig)
     print(f"✅ Chart for decade categories saved to '{decades_chart_path}'")
 
 
@@ -2,12 +2,15 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import re
+import gc
 from wordcloud import WordCloud, STOPWORDS
 
 # ==============================================================================
 # CONFIGURATION
 # ==============================================================================
 CSV_FILE_PATH = 'descriptions_categorized.csv'
+# Columns used by the analysis; the others are not parsed
+ANALYSIS_COLUMNS = ['primary_category', 'date', 'description']
 # English stopwords for the Word Cloud
 STOPWORDS_EN = set(STOPWORDS)
 STOPWORDS_EN.update([
@@ -15,30 +18,33 @@ STOPWORDS_EN.update([
     "design", "construction", "features", "likely", "suggests", "use",
     "application", "applications", "designed", "function", "purpose"
 ])
+# Words for the Word Cloud: runs of two or more word characters (apostrophes allowed inside).
+# Words are lowercased and counted singly (no bigrams, no plural merging), after dropping
+# stopwords, numbers and a trailing "'s".
+WORD_PATTERN = r"\w[\w']+"
 
 
 # ==============================================================================
 # HELPER FUNCTIONS
 # ==============================================================================
-def extract_year(date_str):
-    """Extracts the first year from a date string like '1920 - 1940' or 'c. 1995'."""
-    if not isinstance(date_str, str):
-        return None
-    # Find all four-digit numbers in the string
-    numbers = re.findall(r'\b\d{4}\b', date_str)
-    if numbers:
-        # Return the first year found as an integer
-        return int(numbers[0])
-    return None
+# Four-digit numbers in a date string (compiled once, used for every row)
+_YEAR_RE = re.compile(r'\b(\d{4})\b')
+
+def extract_year(dates):
+    """Extracts the first year from each date string like '1920 - 1940' or 'c. 1995'."""
+    # Find the first four-digit number in every row at once; rows without one become NaN
+    return pd.to_numeric(dates.astype("string").str.extract(_YEAR_RE, expand=False), errors='coerce').astype(float)
 
 def plot_and_save(plot_function, filename, title):
     """Wrapper to create, style, and save plots."""
-    plt.figure(figsize=(12, 8))
-    plot_function()
-    plt.title(title, fontsize=16, pad=20)
-    plt.tight_layout()
-    plt.savefig(filename)
-    plt.close()
+    fig = plt.figure(figsize=(12, 8))
+    try:
+        plot_function()
+        plt.title(title, fontsize=16, pad=20)
+        plt.tight_layout()
+        plt.savefig(filename)
+    finally:
+        plt.close(fig)
     print(f"✅ Plot saved as: {filename}")
 
 
@@ -53,7 +59,7 @@ def analyze_data():
     print("1. Loading and inspecting the dataset...")
     print("="*60)
     try:
-        df = pd.read_csv(CSV_FILE_PATH)
+        df = pd.read_csv(CSV_FILE_PATH, usecols=ANALYSIS_COLUMNS)
     except FileNotFoundError:
         print(f"❌ ERROR: The file '{CSV_FILE_PATH}' was not found.")
         return
@@ -83,7 +89,7 @@ def analyze_data():
     print("\n" + "="*60)
     print("3. Analyzing the distribution over time...")
     print("="*60)
-    df['year'] = df['date'].apply(extract_year)
+    df['year'] = extract_year(df['date'])
     df_time = df.dropna(subset=['year'])
     print(f"{len(df_time)} of {len(df)} objects could be assigned to a specific year.")
     
@@ -104,21 +110,29 @@ def analyze_data():
     
     # Create Word Cloud
     print("\nGenerating a Word Cloud from all descriptions...")
-    text = " ".join(desc for desc in df['description'].dropna())
+    # Count the lowercased words once with vectorized string methods instead of joining all
+    # descriptions into one large string for WordCloud to split and count
+    words = df['description'].dropna().str.lower().str.findall(WORD_PATTERN).explode().dropna()
+    words = words.str.replace(r"'s$", '', regex=True)
+    word_counts = words[~words.isin(STOPWORDS_EN) & ~words.str.isdigit()].value_counts()
     wordcloud = WordCloud(
         width=1200, height=800,
         background_color='white',
-        stopwords=STOPWORDS_EN,
         min_font_size=10,
         colormap='cividis'
-    ).generate(text)
+    ).generate_from_frequencies(word_counts.to_dict())
     
-    plt.figure(figsize=(12, 8))
-    plt.imshow(wordcloud, interpolation='bilinear')
-    plt.axis("off")
-    plt.tight_layout(pad=0)
-    plt.savefig('3_description_wordcloud.png')
-    plt.close()
+    fig = plt.figure(figsize=(12, 8))
+    try:
+        plt.imshow(wordcloud, interpolation='bilinear')
+        plt.axis("off")
+        plt.tight_layout(pad=0)
+        plt.savefig('3_description_wordcloud.png')
+    finally:
+        plt.close(fig)
+        # The 1200x800 word cloud keeps its rendered image buffer alive until released
+        del wordcloud
+        gc.collect()
     print("✅ Word Cloud saved as: 3_description_wordcloud.png")
 
     print("\n" + "="*60)
@@ -1,6 +1,10 @@
 import os
+import heapq
 import shutil
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from object_ids import id_prefix
 
 # ==============================================================================
 # 1. KONFIGURATION
@@ -15,10 +19,39 @@ DESTINATION_FOLDER = "demo_pictures"
 # Anzahl der Objekte, die extrahiert werden sollen
 NUMBER_OF_OBJECTS = 10
 
+# Anzahl der Dateien, die parallel kopiert werden
+COPY_WORKERS = 8
+
 # ==============================================================================
 # 2. SKRIPT-LOGIK (Keine Änderungen hier nötig)
 # ==============================================================================
 
+def fast_copy(src, dst):
+    """
+    Kopiert eine Datei samt Metadaten wie shutil.copy2. Unter Linux kopiert
+    os.copy_file_range die Daten im Kernel (auf btrfs/xfs ohne echte Kopie).
+    """
+    remaining = 1
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                # copy_file_range kann weniger Bytes als angefordert kopieren
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        # Manche Dateisysteme (FUSE, overlay, proc) liefern 0, obwohl noch
+                        # Daten fehlen; dann unten normal kopieren statt eine kurze Datei zu behalten
+                        break
+                    remaining -= copied
+        except OSError:
+            # z. B. bei älteren Kerneln oder Dateisystemen ohne Unterstützung
+            remaining = 1
+    if remaining > 0:
+        # Kein copy_file_range oder unvollständig kopiert: Zieldatei komplett neu schreiben
+        shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
+
 def prepare_demo_files_dynamically():
     """
     Findet die ersten 10 einzigartigen Objekt-IDs in einem Ordner und kopiert
@@ -38,17 +71,15 @@ def prepare_demo_files_dynamically():
 
     print(f"\nSchritt 1: Scanne '{SOURCE_FOLDER}' nach Objekt-IDs...")
 
-    # Finde alle einzigartigen Objekt-IDs im Ordner
-    all_object_ids = set()
-    for filename in os.listdir(source_path):
-        if filename.lower().endswith(".jpg"):
-            try:
+    # Gruppiere alle Bilder in einem einzigen Durchlauf nach ihrer Objekt-ID
+    # (os.scandir liefert Name und Dateityp ohne zusätzliche stat-Aufrufe)
+    files_by_id = defaultdict(list)
+    with os.scandir(source_path) as entries:
+        for entry in entries:
+            if entry.name.lower().endswith(".jpg") and entry.is_file():
                 # Extrahiere die ID aus den ersten vier Teilen des Namens
-                object_id = '-'.join(filename.split('-')[:4])
-                all_object_ids.add(object_id)
-            except IndexError:
-                # Ignoriere Dateien, die nicht dem Namensschema entsprechen
-                continue
+                files_by_id[id_prefix(entry.name, 4)].append(entry.name)
+    all_object_ids = set(files_by_id)
 
     if not all_object_ids:
         print("❌ FEHLER: Keine gültigen Objekt-IDs im Quellordner gefunden.")
@@ -61,30 +92,35 @@ def prepare_demo_files_dynamically():
     print(f"✅ {len(ids_for_demo)} einzigartige Objekt-IDs für die Demo ausgewählt.")
     print("\nSchritt 2: Kopiere die zugehörigen Bilder...")
 
-    # Hole eine aktuelle Liste aller Dateien für eine effiziente Suche
-    all_source_files = os.listdir(source_path)
+    copy_futures = []
+
+    # Kopiere die Bilder für die ausgewählten IDs; die Kopien laufen parallel in einem
+    # Thread-Pool, da sie fast nur auf das Dateisystem warten
+    with ThreadPoolExecutor(max_workers=COPY_WORKERS) as executor:
+        for obj_id in ids_for_demo:
+            # Die ersten 4 Bilder (alphabetisch), ohne die ganze Liste zu sortieren
+            files_to_copy = heapq.nsmallest(4, files_by_id[obj_id])
+            
+            if files_to_copy:
+                print(f"  -> Kopiere {len(files_to_copy)} Bilder für ID '{obj_id}'...")
+                for filename in files_to_copy:
+                    copy_futures.append(executor.submit(
+                        fast_copy,
+                        os.path.join(source_path, filename),
+                        os.path.join(destination_path, filename)
+                    ))
+            else:
+                print(f"  -> ⚠️ Warnung: Für die ID '{obj_id}' wurden keine Bilder gefunden.")
+
+        wait(copy_futures)
+
+    # Zähle die erfolgreichen Kopien und melde fehlgeschlagene
     total_copied = 0
-
-    # Kopiere die Bilder für die ausgewählten IDs
-    for obj_id in ids_for_demo:
-        matching_files = sorted([
-            f for f in all_source_files
-            if f.startswith(obj_id) and f.lower().endswith(".jpg")
-        ])
-        
-        files_to_copy = matching_files[:4]
-        
-        if files_to_copy:
-            print(f"  -> Kopiere {len(files_to_copy)} Bilder für ID '{obj_id}'...")
-            for filename in files_to_copy:
-                shutil.copy2(
-                    os.path.join(source_path, filename),
-                    os.path.join(destination_path, filename)
-                )
-                total_copied += 1
+    for future in copy_futures:
+        if future.exception() is None:
+            total_copied += 1
         else:
-            print(f"  -> ⚠️ Warnung: Für die ID '{obj_id}' wurden keine Bilder gefunden.")
-
+            print(f"  -> ❌ FEHLER: Kopieren fehlgeschlagen: {future.exception()}")
 
     print("\n" + "="*50)
     print("✅ KOPIERVORGANG ABGESCHLOSSEN")
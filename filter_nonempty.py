@@ -0,0 +1,173 @@
+import pandas as pd
+import numpy as np
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+def column_has_data(values):
+    """
+    Returns True as soon as one cell is not empty (NaN, or an empty or 'nan' string
+    after stripping). Most columns have data in their first rows, so the scan
+    usually stops right away instead of checking every cell.
+    """
+    for value in values:
+        if pd.isna(value):
+            continue
+        text = str(value).strip()
+        if text and text != 'nan':
+            return True
+    return False
+
+# Row subsets to extract: (input file, output file, first row, end row), with 0-based row
+# positions as in df.iloc[first:end]; the input can be .xls, .xlsx, or .csv
+SUBSET_JOBS = [
+    ('Liste1.xls', 'non_empty_601_900.xlsx', 600, 900),
+    ('Liste2.xls', 'non_empty_501_1000.xlsx', 500, 1000),
+]
+
+def is_up_to_date(input_file, output_file):
+    """Returns True if output_file exists and was written after input_file was last changed."""
+    return (
+        os.path.exists(input_file)
+        and os.path.exists(output_file)
+        and os.path.getmtime(output_file) > os.path.getmtime(input_file)
+    )
+
+def extract_non_empty_columns(input_file, output_file, start, end, force=False):
+    """
+    Loads data from input_file, extracts rows start+1 to end, filters out 
+    columns that are entirely empty (NaN, empty string, or 'nan' string) 
+    within this subset, and saves the result to a new Excel file.
+    The (slow) workbook read is skipped if output_file is newer than input_file,
+    unless force is True (e.g. after changing the row range).
+    """
+    rows = f"{start + 1}-{end}"
+    
+    if not force and is_up_to_date(input_file, output_file):
+        print(f"⏭️  '{output_file}' is up-to-date with '{input_file}', skipping (use --force to rebuild)")
+        return
+    
+    try:
+        # ======================================================================
+        # 1. Data Loading with Encoding Handling
+        # ======================================================================
+        
+        # Check file extension to determine the correct read function
+        if input_file.lower().endswith('.csv'):
+            # Try common encodings for CSV files
+            encodings = ['latin1', 'iso-8859-1', 'cp1252', 'utf-8']
+            df = None
+            for encoding in encodings:
+                try:
+                    # Attempt to read the CSV with the current encoding
+                    df = pd.read_csv(input_file, encoding=encoding)
+                    print(f"✅ Success with Encoding: {encoding}")
+                    break
+                except UnicodeDecodeError:
+                    # Continue to the next encoding if a decode error occurs
+                    continue
+            if df is None:
+                # Fallback: Read with error handling (replacing bad bytes)
+                df = pd.read_csv(input_file, encoding='latin1', errors='ignore')
+                print("⚠️  Warning: Used Latin1 fallback with error ignoring.")
+        
+        elif input_file.lower().endswith(('.xls', '.xlsx')):
+            # For Excel files, use pd.read_excel and parse only the header and the requested rows
+            # (the Rust-based calamine engine reads both .xls and .xlsx)
+            df = pd.read_excel(input_file, engine='calamine', skiprows=range(1, start + 1), nrows=end - start)
+        
+        else:
+            # Handle unknown file types
+            raise ValueError(f"Unsupported file format: {input_file}. Requires .csv, .xls, or .xlsx.")
+            
+        print(f"📋 Loaded Data: {len(df)} rows, {len(df.columns)} columns")
+        
+        # ======================================================================
+        # 2. Subsetting Rows
+        # ======================================================================
+        
+        # Extract the requested rows (using 0-based indexing: index start up to, but not including, end)
+        # Excel files were already limited to these rows while loading
+        extracted_data = df.iloc[start:end] if input_file.lower().endswith('.csv') else df
+        
+        # ======================================================================
+        # 3. Filtering Non-Empty Columns
+        # ======================================================================
+        
+        # Check each column's raw values, stopping at its first non-empty cell
+        has_data = np.array([column_has_data(values.to_numpy()) for _, values in extracted_data.items()], dtype=bool)
+        non_empty_columns = extracted_data.columns[has_data].tolist()
+        empty_columns = extracted_data.columns[~has_data].tolist()
+        
+        # Keep only the columns that were found to contain data in the requested range
+        filtered_data = extracted_data[non_empty_columns]
+        
+        # ======================================================================
+        # 4. Save Output and Print Summary
+        # ======================================================================
+        
+        # Write the resulting DataFrame to the specified Excel file
+        # (xlsxwriter writes the sheet directly instead of building an openpyxl workbook in memory)
+        # index=False prevents writing the DataFrame index to the file
+        filtered_data.to_excel(output_file, index=False, engine='xlsxwriter')
+        
+        # Also write a Parquet copy (with dtypes) that the merge step reads much faster than the Excel file.
+        # Text columns often mix numbers and text (e.g. T14 holds years and date ranges), which Parquet
+        # cannot store in one column, so they are written as strings (the merge reads Excel the same way).
+        parquet_file = os.path.splitext(output_file)[0] + '.parquet'
+        try:
+            object_columns = [column for column, dtype in filtered_data.dtypes.items() if dtype == object]
+            filtered_data.astype({column: 'string' for column in object_columns}).to_parquet(
+                parquet_file, engine='pyarrow', compression='zstd', index=False
+            )
+            print(f"✅ Parquet copy saved to '{parquet_file}'")
+        except Exception as e:
+            # Remove an outdated copy so the merge falls back to Excel
+            if os.path.exists(parquet_file):
+                os.remove(parquet_file)
+            print(f"⚠️  Warning: Parquet copy not written ({e}); the Excel file remains the only output.")
+        
+        print(f"✅ Success: Rows {rows} with non-empty columns saved to '{output_file}'")
+        print(f"📊 Retained: {len(non_empty_columns)} non-empty columns")
+        print(f"🗑️  Removed: {len(empty_columns)} empty columns")
+        
+        if empty_columns:
+            print(f"❌ Removed Columns: {empty_columns}")
+        
+        print(f"📝 Retained Columns: {non_empty_columns}")
+        print(f"🔢 Final Data Shape: {len(filtered_data)} rows × {len(filtered_data.columns)} columns")
+        
+    except Exception as e:
+        # Print a detailed error message if any step fails
+        print(f"❌ Error during processing: {e}")
+
+def extract_all_non_empty_columns(force=False):
+    """
+    Runs all SUBSET_JOBS at the same time, one process per file
+    (the jobs read different files and share nothing).
+    """
+    with ProcessPoolExecutor(max_workers=len(SUBSET_JOBS)) as executor:
+        list(executor.map(extract_non_empty_columns, *zip(*SUBSET_JOBS), [force] * len(SUBSET_JOBS)))
+
+def main():
+    """
+    Command line entry point: without arguments all SUBSET_JOBS are extracted in parallel,
+    otherwise the single subset given by the arguments.
+    """
+    parser = argparse.ArgumentParser(description="Extracts a row range and drops the columns that are empty in it.")
+    parser.add_argument('input_file', nargs='?', help="Input file (.xls, .xlsx, or .csv)")
+    parser.add_argument('output_file', nargs='?', help="Output Excel file")
+    parser.add_argument('start', nargs='?', type=int, help="First row (0-based position, as in df.iloc[start:end])")
+    parser.add_argument('end', nargs='?', type=int, help="End row (exclusive)")
+    parser.add_argument('--force', action='store_true', help="Rebuild the output even if it is newer than the input")
+    args = parser.parse_args()
+    
+    if args.input_file is None:
+        extract_all_non_empty_columns(args.force)
+    elif args.end is None:
+        parser.error("input_file, output_file, start and end must be given together")
+    else:
+        extract_non_empty_columns(args.input_file, args.output_file, args.start, args.end, args.force)
+
+if __name__ == "__main__":
+    main()
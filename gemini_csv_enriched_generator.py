@@ -4,20 +4,34 @@ Reads image files, enriches them with data from a CSV based on a shared object I
 and generates fact-based, museum-quality descriptions.
 """
 
+import io
 import os
 import csv
 import time
 import random
-import pandas as pd
-from pathlib import Path
-from collections import defaultdict
-from typing import Optional, List, Tuple, Dict
+import asyncio
+import functools
+import hashlib
+import heapq
+import itertools
+import json
+import re
+import sqlite3
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+from collections import defaultdict, deque
+from typing import Callable, Optional, List, Tuple, Dict
 from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
 
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from dotenv import load_dotenv
 from PIL import Image
 
+from object_ids import id_prefix
+
 # ==============================================================================
 # CONFIGURATIONS AND PROMPTS
 # ==============================================================================
@@ -30,32 +44,101 @@ class ProcessingConfig:
     output_csv: str                 # Name of the final output CSV
     language: str = "Deutsch"       # Target output language for the descriptions
     max_image_size: Tuple[int, int] = (2000, 2000) # Max dimensions for images sent to the API
-    rate_limit_batch: int = 5       # Number of objects to process before pausing
-    rate_limit_delay: float = 25.0  # Delay (in seconds) to respect API rate limits
+    rate_limit_batch: int = 5       # Max. concurrent batch requests (each up to objects_per_request objects); also the row-flush interval
+    provider: str = "google"        # Provider profile used to seed the API rate limits
+    cache_path: Optional[str] = "description_cache.sqlite" # Response cache file (None disables caching)
+    reuse_similar_metadata: bool = False # Reuse the description of an earlier object with the same normalized metadata
+    objects_per_request: int = 3    # Number of objects described together in one structured (JSON) request
+    thumbnail_cache_dir: Optional[str] = "thumbnail_cache" # Resized images reused across runs (None disables caching)
+
+# Default API rate limits per provider (requests and tokens per rolling minute)
+PROVIDER_RATE_LIMITS = {"google": {"rpm": 60, "tpm": 100_000}}
+
+# Rough token cost estimates used by the rate limiter (Gemini bills a fixed amount per image)
+TOKENS_PER_IMAGE = 258
+CHARS_PER_TOKEN = 4
+EXPECTED_OUTPUT_TOKENS = 300   # Headline plus a 70-90 word description
+
+# Transient API errors (HTTP 429/503, timeouts) that are retried with exponential backoff
+TRANSIENT_API_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+)
+MAX_API_ATTEMPTS = 3  # Total number of attempts per object
 
-# Prompt template focusing on integrating factual database information
-CAPTION_PROMPT_TEMPLATE = (
+# Static instruction block, byte-identical for every request so the API can reuse it as a cached prompt prefix
+STATIC_PROMPT_PREFIX = (
     "As an expert **Museum Curator and Art Historian**, your task is to generate a formal public exhibition label (wall text). "
-    "Analyze the provided images and use the factual data from the museum database as the primary source of truth. "
-    "\n\n**DATABASE INFORMATION (Source of Truth):**"
-    "\n- **Object ID:** {object_id}"
-    "\n- **Date:** {date}"
-    "\n- **Material:** {material}"
-    "\n- **Dimensions:** {dimensions}"
+    "Analyze the provided images and use the factual data from the museum database (given below) as the primary source of truth. "
     "\n\n**YOUR TASK:**"
     "\n1. Synthesize the database information with the visual evidence from the images."
     "\n2. Focus exclusively on the object's physical characteristics, context, and significance."
     "\n3. **Do NOT contradict the database information.** If an image seems to show something different, assume the database is correct."
     "\n4. If a database field is marked as 'N/A', do not invent information for it."
+    "\n5. The title must be short and compelling, and consistent with the provided data."
+    "\n6. The description must be approx. **70-90 words** and weave the database facts naturally into a descriptive text about the object's appearance, context, and function."
+)
+
+# Database facts of one object, shared by the single and the multi-object prompt
+DATABASE_INFO_TEMPLATE = (
+    "**DATABASE INFORMATION (Source of Truth):**"
+    "\n- **Object ID:** {object_id}"
+    "\n- **Date:** {date}"
+    "\n- **Material:** {material}"
+    "\n- **Dimensions:** {dimensions}"
+)
+
+# Per-object part of the prompt (database facts, output language and format), appended after the static prefix
+DYNAMIC_PROMPT_SUFFIX = (
+    DATABASE_INFO_TEMPLATE +
     "\n\n**Output must be in {language_name}.**"
     "\n\nProvide your response in the following format:"
     "\n{headline_tag}: [A short, compelling title for the museum object, consistent with the provided data.]"
-    "\n{description_tag}: [The formal museum description in {language_name}, approx. **70-90 words**. Weave the database facts naturally into a descriptive text about the object's appearance, context, and function.]"
+    "\n{description_tag}: [The formal museum description in {language_name}, approx. **70-90 words**.]"
 )
 
+# Multi-object request: a header after the static prefix, then one object header before each object's images
+BATCH_PROMPT_HEADER = (
+    "You receive **{object_count} different museum objects**. Each object starts with its database information, "
+    "followed by its images. Describe every object on its own, using only its own data and images."
+    "\n\n**Output must be in {language_name}.**"
+    "\n\nReturn a JSON array with one entry per object: its exact Object ID as 'id', "
+    "the title as 'headline' and the description as 'description'."
+)
+BATCH_OBJECT_HEADER = "\n\n**OBJECT {index} of {object_count}**\n" + DATABASE_INFO_TEMPLATE
+
+# Structured output schema for the multi-object request
+BATCH_RESPONSE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {"id": {"type": "STRING"}, "headline": {"type": "STRING"}, "description": {"type": "STRING"}},
+        "required": ["id", "headline", "description"],
+    },
+}
+
 # Mapping of keywords for parsing the Gemini response and selecting the target language
 LANGUAGE_MAPPING = {"Deutsch": ("TITEL", "BESCHREIBUNG"), "English": ("HEADLINE", "DESCRIPTION")}
 
+# The single-object prompt suffix with the language and tags already filled in;
+# only the object's database fields remain to be formatted per call
+_PROMPT_SUFFIX_BY_LANGUAGE = {
+    language: DYNAMIC_PROMPT_SUFFIX
+    .replace("{language_name}", language)
+    .replace("{headline_tag}", headline_tag)
+    .replace("{description_tag}", description_tag)
+    for language, (headline_tag, description_tag) in LANGUAGE_MAPPING.items()
+}
+
+# Supported image file extensions (lowercase; a tuple so it can be passed to str.endswith)
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+# CSV columns used for the metadata lookup (Object ID, material, dimensions, date)
+METADATA_COLUMNS = {"t1", "T3", "T5", "T14"}
+# Metadata columns and the field names they are stored under
+METADATA_FIELDS = {"T3": "material", "T5": "dimensions", "T14": "date"}
+
 # ==============================================================================
 # DATA LOADING FUNCTION
 # ==============================================================================
@@ -66,115 +149,440 @@ def load_and_prepare_data(csv_path: str) -> Dict[str, Dict[str, str]]:
     using a standardized lookup key based on the 't1' column.
     """
     try:
-        # Read CSV, treating all data as strings and filling missing values with "N/A"
-        df = pd.read_csv(csv_path, dtype=str).fillna("N/A")
-        data_map = {}
-        
-        # Clean 't1' column (Object ID)
-        df['cleaned_t1'] = df['t1'].astype(str).str.strip()
-        
-        # Create a standardized lookup key from 't1' (e.g., 'A/B-C D' -> 'A-B-C')
-        df['lookup_key'] = (
-            df['cleaned_t1']
-            .str.replace('/', '-', regex=False)  # Replace slashes with hyphens
-            .str.split(' ').str[0]              # Take only the first part before a space
+        # Read only the needed columns straight into Arrow string arrays (multi-threaded parser,
+        # no pandas objects); quoted fields may contain line breaks, empty cells become null
+        table = pv.read_csv(
+            csv_path,
+            parse_options=pv.ParseOptions(newlines_in_values=True),
+            convert_options=pv.ConvertOptions(
+                include_columns=["t1", *METADATA_FIELDS],
+                include_missing_columns=True,  # Columns missing from the CSV become null ("N/A")
+                column_types={column: pa.string() for column in METADATA_COLUMNS},
+                strings_can_be_null=True,
+            ),
         )
-        
-        # Drop duplicates based on the lookup key, keeping the first valid entry
-        df_unique = df.drop_duplicates(subset='lookup_key', keep='first')
-        
-        # Populate the final dictionary structure
-        for _, row in df_unique.iterrows():
-            key = row['lookup_key']
-            data_map[key] = {
-                # Use .get() for robust access to potentially missing columns
-                "material": row.get('T3', 'N/A'),
-                "dimensions": row.get('T5', 'N/A'),
-                "date": row.get('T14', 'N/A')
-            }
+        if table["t1"].null_count == len(table):
+            raise KeyError("t1")
+
+        # Create a standardized lookup key from the cleaned 't1' Object ID (e.g., 'A/B-C D' -> 'A-B-C')
+        keys = pc.utf8_trim_whitespace(pc.fill_null(table["t1"], "N/A"))
+        keys = pc.replace_substring(keys, "/", "-")  # Replace slashes with hyphens
+        keys = pc.list_element(pc.split_pattern(keys, " ", max_splits=1), 0)  # Take only the first part before a space
+
+        # Keep the first row per lookup key: index_in finds each unique key's first occurrence
+        first_rows = pc.index_in(pc.unique(keys), value_set=keys)
+        columns = {
+            name: pc.fill_null(table[column].take(first_rows), "N/A").to_pylist()
+            for column, name in METADATA_FIELDS.items()
+        }
+
+        # Populate the final dictionary in one pass over the columns
+        data_map = {
+            key: dict(zip(columns, values))
+            for key, *values in zip(keys.take(first_rows).to_pylist(), *columns.values())
+        }
         print(f"✅ Successfully loaded data for {len(data_map)} unique objects from CSV.")
         return data_map
     except Exception as e:
         print(f"❌ ERROR processing CSV: {e}")
         return {}
 
+# ==============================================================================
+# RATE LIMITER
+# ==============================================================================
+
+class RateLimiter:
+    """
+    Sliding-window limiter for requests and tokens per minute. Keeps the timestamps
+    of the last 60 seconds and only delays the request that would exceed a limit.
+    """
+    def __init__(self, rpm: int, tpm: int, window: float = 60.0):
+        self.rpm, self.tpm, self.window = rpm, tpm, window
+        self.requests = deque()   # Start times of the requests inside the window
+        self.tokens = deque()     # (start time, estimated tokens) inside the window
+        self.token_total = 0
+
+    def _prune(self, now: float):
+        """Drops the entries that have left the rolling window."""
+        while self.requests and now - self.requests[0] >= self.window:
+            self.requests.popleft()
+        while self.tokens and now - self.tokens[0][0] >= self.window:
+            self.token_total -= self.tokens.popleft()[1]
+
+    async def acquire(self, estimated_tokens: int):
+        """Waits only as long as needed for the request to fit under both limits."""
+        # A single request larger than the whole budget would otherwise wait forever
+        estimated_tokens = min(estimated_tokens, self.tpm)
+        while True:
+            now = time.monotonic()
+            self._prune(now)
+            wait = 0.0
+            if len(self.requests) >= self.rpm:
+                wait = self.requests[0] + self.window - now
+            if self.token_total + estimated_tokens > self.tpm:
+                # Wait until enough of the oldest token entries have expired
+                excess = self.token_total + estimated_tokens - self.tpm
+                for stamp, count in self.tokens:
+                    excess -= count
+                    if excess <= 0:
+                        wait = max(wait, stamp + self.window - now)
+                        break
+            if wait <= 0:
+                # No await between the check and the update, so concurrent callers cannot overbook
+                self.requests.append(now)
+                self.tokens.append((now, estimated_tokens))
+                self.token_total += estimated_tokens
+                return
+            await asyncio.sleep(wait)
+
+# ==============================================================================
+# RESPONSE CACHE
+# ==============================================================================
+
+class CaptionCache:
+    """
+    Persistent SQLite cache mapping (images, metadata, prompt, model, language)
+    to a generated headline and description, so re-runs skip the API call.
+    """
+    def __init__(self, db_path: str):
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS descriptions (key BLOB PRIMARY KEY, headline TEXT, description TEXT, ts INTEGER)"
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def make_key(image_paths: List[str], object_data: Dict[str, str], prompt: str, model_name: str, language: str) -> bytes:
+        """
+        SHA-256 over the image bytes (streamed in 64 KiB chunks), the sorted metadata,
+        the whitespace-normalized prompt, the model name and the language.
+        """
+        hasher = hashlib.sha256()
+        for path in image_paths:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(65536), b''):
+                    hasher.update(chunk)
+        # Collapse whitespace so trivial prompt edits (indentation, line breaks) still hit
+        normalized_prompt = ' '.join(prompt.split())
+        for part in (json.dumps(object_data, sort_keys=True), normalized_prompt, model_name, language):
+            # NUL separators keep the boundaries between the parts unambiguous
+            hasher.update(b'\0' + part.encode('utf-8'))
+        return hasher.digest()
+
+    def get(self, key: bytes) -> Optional[Tuple[str, str]]:
+        """Returns the cached (headline, description) pair or None on a miss."""
+        row = self.connection.execute("SELECT headline, description FROM descriptions WHERE key = ?", (key,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def set(self, key: bytes, headline: str, description: str):
+        """Stores a generated description (committed immediately so it survives crashes)."""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO descriptions (key, headline, description, ts) VALUES (?, ?, ?, ?)",
+            (key, headline, description, int(time.time()))
+        )
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+# ==============================================================================
+# IMAGE PREPROCESSING
+# ==============================================================================
+
+def _thumbnail_cache_path(cache_dir: str, path: str, max_size: Tuple[int, int]) -> str:
+    """
+    Returns the cache file of the resized image. The key covers the path, the file's
+    size and modification time, and max_size, so a changed image or size gets a new entry.
+    """
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{max_size[0]}x{max_size[1]}"
+    return os.path.join(cache_dir, hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + ".jpg")
+
+def _preprocess_image(path: str, max_size: Tuple[int, int], cache_dir: Optional[str] = None) -> dict:
+    """
+    Opens, resizes and re-encodes an image to an inline JPEG part for the API.
+    JPEGs that already fit within max_size are passed through without decoding.
+    Resized images are stored in cache_dir (if given) and read from there on later runs.
+    Runs in a worker process, so it has to stay a picklable module-level function.
+    """
+    cache_path = _thumbnail_cache_path(cache_dir, path, max_size) if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            return {'mime_type': 'image/jpeg', 'data': f.read()}
+    with Image.open(path) as img:
+        # Only the header has been read so far, which is enough to know the size and format
+        if img.format == 'JPEG' and img.size[0] <= max_size[0] and img.size[1] <= max_size[1]:
+            with open(path, 'rb') as f:
+                return {'mime_type': 'image/jpeg', 'data': f.read()}
+        # Let libjpeg decode directly at 1/2, 1/4 or 1/8 scale where that still covers max_size
+        # (no-op for PNGs), then finish with the cheaper bilinear filter
+        img.draft('RGB', max_size)
+        img.thumbnail(max_size, Image.Resampling.BILINEAR) # Resize for efficient API transfer
+        buffer = io.BytesIO()
+        img.convert('RGB').save(buffer, format='JPEG', quality=85)
+    if cache_path:
+        try:
+            # Write under a temporary name first, so other workers never read a partial file
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(buffer.getvalue())
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass  # Not fatal: the image is simply resized again next time
+    return {'mime_type': 'image/jpeg', 'data': buffer.getvalue()}
+
+# Placeholders returned by the parsers when a response has no headline or description
+FALLBACK_HEADLINE = "Untitled"
+FALLBACK_DESCRIPTION = "Description not available."
+
+# Runs of whitespace containing a line break, joined into one space when parsing descriptions
+_LINE_BREAKS_RE = re.compile(r'\s*\n\s*')
+
 # ==============================================================================
 # GENERATOR CLASS (With Robust Parser)
 # ==============================================================================
 
+@functools.lru_cache(maxsize=8)
+def _make_parser(h_tag: str, d_tag: str) -> Callable[[str], Tuple[str, str]]:
+    """
+    Builds the response parser for one language's tag pair. The tag patterns
+    are compiled once per tag pair and captured by the returned closure.
+    """
+    h_tag, d_tag = re.escape(h_tag), re.escape(d_tag)
+    # Headline: rest of the line starting with the headline tag (case-insensitive)
+    headline_re = re.compile(rf'^[ \t]*{h_tag}:[ \t]*(.*)$', re.IGNORECASE | re.MULTILINE)
+    # Description: everything after the description tag up to the next headline tag or the end
+    description_re = re.compile(
+        rf'^[ \t]*{d_tag}:(.*?)(?=^[ \t]*{h_tag}:|\Z)', re.IGNORECASE | re.MULTILINE | re.DOTALL
+    )
+
+    def parse(text: str) -> Tuple[str, str]:
+        """
+        Parses the model's response with the compiled patterns; multi-line
+        descriptions are joined into one line.
+        """
+        headline_match = headline_re.search(text)
+        description_match = description_re.search(text)
+        headline = headline_match.group(1).strip() if headline_match else ""
+        # Line breaks (and blank lines) inside the description become single spaces
+        description = _LINE_BREAKS_RE.sub(" ", description_match.group(1).strip()) if description_match else ""
+
+        # Simple cleanup and fallback for empty results
+        return headline or FALLBACK_HEADLINE, description or FALLBACK_DESCRIPTION
+
+    return parse
+
 class GeminiCaptionGenerator:
     """Handles communication with the Gemini API for description generation."""
-    def __init__(self, model_name: str = "models/gemini-2.5-flash-lite-preview-06-17"):
-        # Load API key and configure client
+    def __init__(self, model_name: str = "models/gemini-2.5-flash-lite-preview-06-17", provider: str = "google",
+                 cache_path: Optional[str] = None, reuse_similar_metadata: bool = False,
+                 thumbnail_cache_dir: Optional[str] = None):
+        # Load API key and configure client (default transport: one persistent gRPC channel per client)
         load_dotenv(); genai.configure(api_key=os.environ.get("GOOGLE_API_KEY"))
+        self.model_name = model_name
         self.model = genai.GenerativeModel(model_name)
+        limits = PROVIDER_RATE_LIMITS[provider]
+        self.rate_limiter = RateLimiter(limits["rpm"], limits["tpm"])
+        # Optional persistent cache of previously generated descriptions
+        self.cache = CaptionCache(cache_path) if cache_path else None
+        # Descriptions of this run keyed by normalized metadata (only used if reuse is enabled)
+        self.similar_results = {} if reuse_similar_metadata else None
+        # Worker processes decoding and resizing the images, and their pending results per path
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.preprocessed: Dict[str, asyncio.Future] = {}
+        self.max_image_size = (2000, 2000)
+        # Optional folder of resized images kept across runs
+        self.thumbnail_cache_dir = thumbnail_cache_dir
+        if thumbnail_cache_dir: os.makedirs(thumbnail_cache_dir, exist_ok=True)
+
+    def prefetch_images(self, image_paths: List[str], max_size: Tuple[int, int]):
+        """Submits images to the process pool ahead of their requests, so decoding overlaps with the API calls."""
+        loop = asyncio.get_running_loop()
+        self.pool = self.pool or ProcessPoolExecutor(max_workers=os.cpu_count())
+        self.max_image_size = max_size
+        for path in image_paths:
+            if path not in self.preprocessed:
+                self.preprocessed[path] = loop.run_in_executor(self.pool, _preprocess_image, path, max_size, self.thumbnail_cache_dir)
+
+    async def warm_up(self):
+        """Opens the API connection with a free count_tokens call before the first real request."""
+        try:
+            await self.model.count_tokens_async("ping")
+        except Exception:
+            # Not fatal: the first real request simply opens the connection itself
+            pass
+
+    async def _load_image(self, path: str) -> dict:
+        """Returns the prepared image as an inline image part (decoded in the pool if not prefetched)."""
+        future = self.preprocessed.pop(path, None)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            self.pool = self.pool or ProcessPoolExecutor(max_workers=os.cpu_count())
+            future = loop.run_in_executor(self.pool, _preprocess_image, path, self.max_image_size, self.thumbnail_cache_dir)
+        return await future
 
-    def generate_object_description(self, image_paths: List[str], object_data: Dict[str, str], language: str) -> Optional[Tuple[str, str]]:
+    async def generate_object_description(self, image_paths: List[str], object_data: Dict[str, str], language: str) -> Optional[Tuple[str, str]]:
+        """Generates the headline and description of a single object."""
+        return (await self.generate_object_descriptions([(image_paths, object_data)], language))[0]
+
+    async def generate_object_descriptions(self, objects: List[Tuple[List[str], Dict[str, str]]], language: str) -> List[Optional[Tuple[str, str]]]:
         """
         Formats the prompt with object data, sends images and prompt to Gemini,
-        and returns the parsed headline and description.
+        and returns the parsed headline and description per object (None where generation failed).
+        Objects that are not cached are sent together in one structured request.
         """
+        results: List[Optional[Tuple[str, str]]] = [None] * len(objects)
         try:
-            # Load and resize images
-            images = []
-            for p in image_paths:
-                img = Image.open(p)
-                img.thumbnail((2000, 2000)) # Resize for efficient API transfer
-                images.append(img)
-            if not images: return None
-            
             # Get language-specific tags
             headline_tag, description_tag = LANGUAGE_MAPPING[language]
             
-            # Format the prompt with factual data
-            prompt = CAPTION_PROMPT_TEMPLATE.format(
-                language_name=language, headline_tag=headline_tag, description_tag=description_tag,
-                object_id=object_data.get('object_id', 'N/A'), date=object_data.get('date', 'N/A'),
-                material=object_data.get('material', 'N/A'), dimensions=object_data.get('dimensions', 'N/A')
-            )
+            cache_keys, metadata_keys, pending = {}, {}, []
+            if self.cache:
+                # Hashing the original images is slow file I/O, so the keys are computed in
+                # worker threads instead of stalling the other requests on the event loop
+                loop = asyncio.get_running_loop()
+                keyed = [i for i, (image_paths, _) in enumerate(objects) if image_paths]
+                keys = await asyncio.gather(*(
+                    loop.run_in_executor(
+                        None, CaptionCache.make_key, objects[i][0], objects[i][1],
+                        STATIC_PROMPT_PREFIX + self._object_prompt(objects[i][1], language), self.model_name, language
+                    )
+                    for i in keyed
+                ))
+                cache_keys = dict(zip(keyed, keys))
+            for i, (image_paths, object_data) in enumerate(objects):
+                if not image_paths: continue
+                
+                # Cache lookup: identical images, metadata and prompt skip the API call entirely
+                if self.cache:
+                    results[i] = self.cache.get(cache_keys[i])
+                    if results[i]: continue
+                
+                # Near-duplicate lookup: objects with the same material, dimensions and date share a description
+                metadata_keys[i] = self._metadata_key(object_data, language) if self.similar_results is not None else None
+                if metadata_keys[i] and metadata_keys[i] in self.similar_results:
+                    results[i] = self.similar_results[metadata_keys[i]]
+                    continue
+                pending.append(i)
+            if not pending: return results
+            
+            # Build the request: static prefix first so consecutive requests share it exactly,
+            # then the resized images (usually already prepared by the process pool)
+            generation_config = None
+            if len(pending) == 1:
+                image_paths, object_data = objects[pending[0]]
+                contents = [STATIC_PROMPT_PREFIX, self._object_prompt(object_data, language)]
+                contents += [await self._load_image(p) for p in image_paths]
+            else:
+                contents = [STATIC_PROMPT_PREFIX, BATCH_PROMPT_HEADER.format(object_count=len(pending), language_name=language)]
+                for index, i in enumerate(pending, 1):
+                    image_paths, object_data = objects[i]
+                    contents.append(BATCH_OBJECT_HEADER.format(index=index, object_count=len(pending), **self._prompt_fields(object_data)))
+                    contents += [await self._load_image(p) for p in image_paths]
+                generation_config = {"response_mime_type": "application/json", "response_schema": BATCH_RESPONSE_SCHEMA}
             
-            # API Call: send prompt and all images
-            response = self.model.generate_content([prompt, *images])
+            # API Call: send prompts and all images (retried on transient errors)
+            image_count = sum(1 for part in contents if isinstance(part, dict))
+            prompt_length = sum(len(part) for part in contents if isinstance(part, str))
+            estimated_tokens = (
+                prompt_length // CHARS_PER_TOKEN + TOKENS_PER_IMAGE * image_count + EXPECTED_OUTPUT_TOKENS * len(pending)
+            )
+            response = await self._generate_with_retry(contents, estimated_tokens, generation_config)
+            if not hasattr(response, 'text'): return results
             
-            # Parse the response text
-            return self._parse_response(response.text, headline_tag, description_tag) if hasattr(response, 'text') else None
+            # Parse the response text and remember the results for later runs
+            if len(pending) == 1:
+                parsed = {pending[0]: self._parse_response(response.text, headline_tag, description_tag)}
+            else:
+                parsed = self._parse_batch_response(response.text, {objects[i][1].get('object_id'): i for i in pending})
+            for i, result in parsed.items():
+                results[i] = result
+                # Parser placeholders are not remembered, so a bad response is retried on the next run
+                if result[0] == FALLBACK_HEADLINE or result[1] == FALLBACK_DESCRIPTION: continue
+                if self.cache: self.cache.set(cache_keys[i], *result)
+                if metadata_keys.get(i): self.similar_results[metadata_keys[i]] = result
+            return results
+        except google_exceptions.GoogleAPIError:
+            # API errors are passed on so the caller can record which error class ended the request
+            raise
         except Exception as e:
             print(f"  Error generating description: {e}")
-            return None
+            return results
 
     @staticmethod
-    def _parse_response(text: str, h_tag: str, d_tag: str) -> Tuple[str, str]:
+    def _prompt_fields(object_data: Dict[str, str]) -> Dict[str, str]:
+        """Database fields for the prompt templates, with 'N/A' for missing values."""
+        return {field: object_data.get(field, 'N/A') for field in ('object_id', 'date', 'material', 'dimensions')}
+
+    @staticmethod
+    def _object_prompt(object_data: Dict[str, str], language: str) -> str:
+        """Formats the per-object part of the single-object prompt with factual data."""
+        return _PROMPT_SUFFIX_BY_LANGUAGE[language].format(**GeminiCaptionGenerator._prompt_fields(object_data))
+
+    @staticmethod
+    def _parse_batch_response(text: str, index_by_id: Dict[str, int]) -> Dict[int, Tuple[str, str]]:
         """
-        Robustly parses the model's response using state tracking to handle
-        multi-line descriptions correctly.
+        Maps the JSON entries of a multi-object response back to the objects by their ID.
+        Entries with unknown IDs are ignored; objects without an entry are left out.
         """
-        headline, description = "", ""
-        in_description = False # State flag
+        parsed = {}
+        for entry in json.loads(text):
+            i = index_by_id.get(str(entry.get('id', '')).strip())
+            if i is not None:
+                parsed[i] = (
+                    entry.get('headline', '').strip() or FALLBACK_HEADLINE,
+                    entry.get('description', '').strip() or FALLBACK_DESCRIPTION
+                )
+        return parsed
 
-        # Normalize tags for case-insensitive matching
-        h_prefix = f'{h_tag.upper()}:'
-        d_prefix = f'{d_tag.upper()}:'
-        
-        for line in text.strip().split('\n'):
-            stripped_line = line.strip()
-            if not stripped_line: continue
-
-            # 1. Check for headline tag
-            if stripped_line.upper().startswith(h_prefix):
-                headline = stripped_line[len(h_prefix):].strip()
-                in_description = False # Headline prefix resets description state
-
-            # 2. Check for description tag
-            elif stripped_line.upper().startswith(d_prefix):
-                description = stripped_line[len(d_prefix):].strip()
-                in_description = True # Start of a description block
-            
-            # 3. If currently in a description block, append the line
-            elif in_description:
-                description += " " + stripped_line
+    @staticmethod
+    def _metadata_key(object_data: Dict[str, str], language: str) -> Optional[str]:
+        """
+        Normalizes the descriptive metadata (case, whitespace, punctuation) into a lookup key.
+        Returns None if no field is known, since such objects have nothing in common.
+        """
+        fields = [object_data.get(name, 'N/A') for name in ('material', 'dimensions', 'date')]
+        if all(value == 'N/A' for value in fields): return None
+        normalized = (
+            '' if value == 'N/A' else ' '.join(re.sub(r'[^\w\s]', ' ', value.casefold()).split())
+            for value in fields
+        )
+        return language + '|' + '|'.join(normalized)
 
-        # Simple cleanup and fallback for empty results
-        return headline or "Untitled", description.strip() or "Description not available."
+    async def _generate_with_retry(self, contents: list, estimated_tokens: int, generation_config: Optional[dict] = None):
+        """
+        Sends the request, retrying transient errors up to MAX_API_ATTEMPTS times with
+        exponential backoff plus jitter, or the delay from a Retry-After header if present.
+        """
+        for attempt in range(MAX_API_ATTEMPTS):
+            # Every attempt counts against the RPM/TPM limits
+            await self.rate_limiter.acquire(estimated_tokens)
+            try:
+                return await self.model.generate_content_async(contents, generation_config=generation_config)
+            except TRANSIENT_API_ERRORS as e:
+                if attempt == MAX_API_ATTEMPTS - 1:
+                    raise
+                delay = self._retry_after(e)
+                if delay is None:
+                    delay = 2 ** attempt + random.random()
+                print(f"  {type(e).__name__}, retrying in {delay:.1f}s (attempt {attempt + 2}/{MAX_API_ATTEMPTS})...")
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """Reads the server-suggested delay (in seconds) from the Retry-After header, if any."""
+        response = getattr(error, 'response', None)
+        value = getattr(response, 'headers', {}).get('Retry-After') if response is not None else None
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            # HTTP-date values are not worth parsing here; fall back to the backoff delay
+            return None
+
+    @staticmethod
+    def _parse_response(text: str, h_tag: str, d_tag: str) -> Tuple[str, str]:
+        """Parses the model's response with the (memoized) parser for this tag pair."""
+        return _make_parser(h_tag, d_tag)(text)
 
 # ==============================================================================
 # PROCESSOR CLASS
@@ -184,18 +592,29 @@ class ObjectProcessor:
     """Manages the overall workflow: grouping, data lookup, and processing."""
     def __init__(self, config: ProcessingConfig, data_map: Dict[str, Dict[str, str]]):
         self.config = config
-        self.generator = GeminiCaptionGenerator()
+        self.generator = GeminiCaptionGenerator(
+            provider=config.provider, cache_path=config.cache_path,
+            reuse_similar_metadata=config.reuse_similar_metadata,
+            thumbnail_cache_dir=config.thumbnail_cache_dir
+        )
         self.data_map = data_map
+        # Image paths of the request batches whose images are not being prepared yet (in processing order)
+        self.pending_prefetch = deque()
 
     def process(self):
-        """Orchestrates the image grouping and the sequential processing of objects."""
+        """Orchestrates the image grouping and the concurrent processing of objects."""
         # Group images based on their shared object ID prefix
         object_groups = self._group_images_by_id(self.config.input_path)
         if not object_groups: 
             print("No image groups found. Check input path and file naming convention.")
             return
         print(f"\nFound {len(object_groups)} unique image groups to process.")
-        self._process_objects(object_groups)
+        object_groups = self._drop_duplicate_images(object_groups)
+        try:
+            asyncio.run(self._process_objects(object_groups))
+        finally:
+            if self.generator.cache: self.generator.cache.close()
+            if self.generator.pool: self.generator.pool.shutdown()
 
     @staticmethod
     def _group_images_by_id(directory: str) -> dict:
@@ -203,63 +622,157 @@ class ObjectProcessor:
         Groups image files based on the first four hyphen-separated parts of the filename.
         Example: 'A-B-C-D-view1.jpg' -> key 'A-B-C-D'
         """
-        image_groups = defaultdict(list)
-        for filename in os.listdir(directory):
-            # Only process common image file types
-            if Path(filename).suffix.lower() in {".jpg", ".jpeg", ".png"}:
-                try:
-                    # Assumes object ID is the first four hyphen-separated parts
-                    object_id = '-'.join(filename.split('-')[:4])
-                    image_groups[object_id].append(os.path.join(directory, filename))
-                except IndexError: 
-                    # Ignores files that don't match the expected naming format
-                    continue 
-        return dict(image_groups)
-
-    def _process_objects(self, object_groups: dict):
-        """Iterates through grouped objects, fetches data, calls the generator, and saves results."""
-        with open(self.config.output_csv, "w", newline="", encoding="utf-8") as file:
+        # os.scandir yields the name, full path and cached file type together
+        with os.scandir(directory) as entries:
+            # Only process common image file types (plain string check, no Path object per file);
+            # assumes object ID is the first four hyphen-separated parts, derived once per file
+            keyed_paths = sorted(
+                (id_prefix(entry.name, 4), entry.path)
+                for entry in entries
+                if entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.is_file()
+            )
+        # Sorted by ID, so each group is one contiguous run (with its paths already in order)
+        return {
+            object_id: [path for _, path in group]
+            for object_id, group in itertools.groupby(keyed_paths, key=lambda pair: pair[0])
+        }
+
+    @staticmethod
+    def _drop_duplicate_images(object_groups: dict) -> dict:
+        """
+        Keeps one file per identical image within each object (e.g. rescans imported twice),
+        so no duplicate is sent to the API or takes one of the 4 image slots.
+        Only files of equal size are hashed, as files of different size cannot be identical.
+        """
+        def digest(path: str) -> str:
+            hasher = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(65536), b''):
+                    hasher.update(chunk)
+            return hasher.hexdigest()
+
+        deduplicated, removed = {}, 0
+        for object_id, image_files in object_groups.items():
+            by_size = defaultdict(list)
+            for path in sorted(image_files):
+                by_size[os.path.getsize(path)].append(path)
+            kept = []
+            for same_size in by_size.values():
+                if len(same_size) == 1:
+                    kept.extend(same_size)
+                    continue
+                seen = set()
+                for path in same_size:
+                    content_hash = digest(path)
+                    if content_hash not in seen:
+                        seen.add(content_hash)
+                        kept.append(path)
+            removed += len(image_files) - len(kept)
+            deduplicated[object_id] = kept
+        if removed:
+            print(f"Skipping {removed} duplicate image file(s).")
+        return deduplicated
+
+    async def _describe_batch(self, semaphore: asyncio.Semaphore, batch: List[Tuple[str, List[str]]]):
+        """Fetches the metadata for a batch of objects and generates their descriptions while holding a concurrency slot."""
+        objects = []
+        for object_id, image_files in batch:
+            # Create the shorter lookup key used in the CSV data map (e.g., 'A-B-C')
+            lookup_key = id_prefix(object_id, 3)
+            
+            # Fetch relevant metadata, defaulting to an empty dict if not found
+            object_data = self.data_map.get(lookup_key, {}).copy()
+            # Add the full object ID for the final output
+            object_data['object_id'] = object_id
+
+            # Select a maximum of 4 images for processing
+            objects.append((heapq.nsmallest(4, image_files), object_data))
+        
+        async with semaphore:
+            print(f"Processing IDs: {', '.join(object_id for object_id, _ in batch)} "
+                  f"(using {sum(len(paths) for paths, _ in objects)} images)...")
+            try:
+                # Generate the descriptions using up to 4 images per object and the metadata
+                results = await self.generator.generate_object_descriptions(objects, self.config.language)
+            except Exception as e:
+                results = [e] * len(objects)
+            finally:
+                # Drop prepared images that were not needed (cache hits, errors) to free their memory
+                for paths, _ in objects:
+                    for path in paths: self.generator.preprocessed.pop(path, None)
+                # Move the prefetch window on by the batch that just finished
+                self._prefetch_batches(1)
+        return [(object_data['object_id'], object_data, result) for (_, object_data), result in zip(objects, results)]
+
+    def _prefetch_batches(self, count: int):
+        """Starts decoding the images of the next `count` request batches that are not prepared yet."""
+        paths = []
+        for _ in range(min(count, len(self.pending_prefetch))):
+            paths.extend(self.pending_prefetch.popleft())
+        if paths:
+            self.generator.prefetch_images(paths, self.config.max_image_size)
+
+    async def _process_objects(self, object_groups: dict):
+        """Runs the object batches concurrently (at most rate_limit_batch requests in flight) and saves each result as soon as it arrives."""
+        concurrency = max(1, self.config.rate_limit_batch)
+        semaphore = asyncio.Semaphore(concurrency)
+        # Several objects share one request (and one network round-trip)
+        groups = list(object_groups.items())
+        batch_size = max(1, self.config.objects_per_request)
+        # Prepare the (up to 4) images only for the next batches: the rate limiter lets requests out
+        # far slower than the pool resizes, so prefetching everything would hold every image in memory.
+        # The window covers two rounds of concurrent batches and moves on as batches finish
+        # (the semaphore admits the batches in order, so each one is prefetched before it starts).
+        self.pending_prefetch = deque(
+            [path for _, image_files in groups[start:start + batch_size] for path in heapq.nsmallest(4, image_files)]
+            for start in range(0, len(groups), batch_size)
+        )
+        self._prefetch_batches(2 * concurrency)
+        # Open the API connection (TLS handshake) before the requests start
+        await self.generator.warm_up()
+        tasks = [
+            asyncio.create_task(self._describe_batch(semaphore, groups[start:start + batch_size]))
+            for start in range(0, len(groups), batch_size)
+        ]
+
+        # 1 MiB buffer: rows are collected in memory and written in few large chunks
+        with open(self.config.output_csv, "w", newline="", encoding="utf-8", buffering=1024 * 1024) as file:
             writer = csv.writer(file)
             # Write the standardized CSV header
             writer.writerow(["object_id", "headline", "description", "material", "date", "dimensions"])
 
-            for idx, (object_id, image_files) in enumerate(object_groups.items(), 1):
-                # Create the shorter lookup key used in the CSV data map (e.g., 'A-B-C')
-                lookup_key = '-'.join(object_id.split('-')[:3])
-                
-                # Fetch relevant metadata, defaulting to an empty dict if not found
-                object_data = self.data_map.get(lookup_key, {}).copy()
-                # Add the full object ID for the final output
-                object_data['object_id'] = object_id
-
-                # Select a maximum of 4 images for processing
-                files_to_process = sorted(image_files)[:4]
-                print(f"[{idx}/{len(object_groups)}] Processing ID: {object_id} (using {len(files_to_process)} images)...")
-                
-                try:
-                    # Generate the description using up to 4 images and the metadata
-                    result = self.generator.generate_object_description(files_to_process, object_data, self.config.language)
-                    headline, description = result if result else ("Untitled", "Fallback: Generation failed.")
-
-                    print(f"  -> Headline: {headline}")
-                    
-                    # Write the result to the output CSV
-                    writer.writerow([
-                        object_id, headline, description,
-                        object_data.get('material', 'N/A'),
-                        object_data.get('date', 'N/A'),
-                        object_data.get('dimensions', 'N/A')
-                    ])
-                    
-                    # Rate limiting mechanism
-                    if idx % self.config.rate_limit_batch == 0 and idx < len(object_groups):
-                        print(f"  Pausing for {self.config.rate_limit_delay}s to respect API rate limits...")
-                        time.sleep(self.config.rate_limit_delay)
-                except Exception as e:
-                    # Log a fatal error for this specific object ID
-                    print(f"  -> FATAL ERROR for {object_id}: {e}")
-                    # You might consider writing a fallback line here too
-                    writer.writerow([object_id, "Error", f"Fatal error: {e}", "N/A", "N/A", "N/A"])
+            # Rows are written in completion order, so finished objects are kept even if the run is interrupted.
+            # They are collected and handed to writerows once per batch of concurrent requests.
+            rows = []
+            idx = 0
+            try:
+                for task in asyncio.as_completed(tasks):
+                    for object_id, object_data, result in await task:
+                        idx += 1
+                        if isinstance(result, Exception):
+                            # Log a fatal error for this specific object ID
+                            error = f"{type(result).__name__}: {result}"
+                            print(f"[{idx}/{len(object_groups)}] -> FATAL ERROR for {object_id}: {error}")
+                            rows.append([object_id, "Error", f"Fatal error: {error}", "N/A", "N/A", "N/A"])
+                        else:
+                            headline, description = result if result else ("Untitled", "Fallback: Generation failed.")
+                            print(f"[{idx}/{len(object_groups)}] {object_id} -> Headline: {headline}")
+
+                            rows.append([
+                                object_id, headline, description,
+                                object_data.get('material', 'N/A'),
+                                object_data.get('date', 'N/A'),
+                                object_data.get('dimensions', 'N/A')
+                            ])
+
+                    # Write and flush once per batch of concurrent requests so a crash loses at most one batch
+                    if len(rows) >= self.config.rate_limit_batch:
+                        writer.writerows(rows)
+                        rows.clear()
+                        file.flush()
+            finally:
+                # Write the remaining rows, also when the run is interrupted
+                writer.writerows(rows)
 
 
 # ==============================================================================
@@ -302,10 +815,4 @@ def main():
         print(f"\nAn unexpected error occurred: {e}")
 
 if __name__ == "__main__":
-    # Check for pandas dependency before starting
-    try:
-        import pandas
-    except ImportError:
-        print("Pandas library not found. Please install it by running: pip install pandas")
-    else:
-        main()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -1,17 +1,28 @@
+import io
 import os
+import asyncio
 import zipfile
+import contextlib
 import csv
-import tempfile
 import time
 import random
-from pathlib import Path
-from typing import Optional, List, Tuple
+import re
+import hashlib
+import functools
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Tuple, Union, BinaryIO, Dict, Any
 from dataclasses import dataclass
 
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from dotenv import load_dotenv
 from PIL import Image
 
+# Module logger; thread- and task-safe replacement for print (configured in main)
+logger = logging.getLogger(__name__)
+
 # ==============================================================================
 # CONFIGURATIONS AND PROMPTS
 # ==============================================================================
@@ -23,8 +34,11 @@ class ProcessingConfig:
     output_csv: str                 # Name of the output CSV file
     language: str = "Deutsch"       # Target language for the output captions
     max_image_size: Tuple[int, int] = (2000, 2000) # Max size for resizing images before sending to API
-    rate_limit_batch: int = 3       # Number of images to process before pausing
-    rate_limit_delay: float = 1.5   # Delay (in seconds) between batches
+    max_requests_per_minute: float = 60.0 # Upper bound for API requests started per minute
+    cache_path: Optional[str] = "caption_cache.sqlite" # SQLite file for cached captions (None disables caching)
+    max_concurrency: int = 5        # Maximum number of API requests in flight at the same time
+    images_per_request: int = 4     # Number of images captioned together in one API request
+    upload_threshold: Optional[int] = None # Opt-in: images larger than this (bytes) go through the Files API (None: always inline)
 
 
 # Prompt template focusing on museum-quality object description
@@ -39,6 +53,21 @@ CAPTION_PROMPT_TEMPLATE = (
     "\n{description_tag}: [The formal museum description in {language_name}. The description must be approx. **70-90 words** long and cover: 1. **Visual Identification** (material, technique, main motif). 2. **Context/Origin** (epoch, culture). 3. **Historical or Cultural Significance** (function, relevance). Avoid unnecessary filler text.]"
 )
 
+# Variant of the prompt for several images in one request (numbered tags per image)
+BATCH_CAPTION_PROMPT_TEMPLATE = (
+    "As an expert **Museum Curator and Art Historian**, your task is to analyze the **physical object** in each of the "
+    "{image_count} uploaded images to generate one **formal public exhibition label** (wall text) per image. "
+    "**Ignore** any photographic elements (lighting, perspective). **Focus exclusively** on the object's material, date, style, and historical function. "
+    "The target audience is a general, non-academic museum visitor. "
+    "\n\n**Output must be in {language_name}.**"
+    "\n\nProvide your response in the following format, numbering the entries in the order of the images (1 to {image_count}):"
+    "\n{headline_tag}_1: [A short, compelling title for the museum object in image 1, stating material and epoch, max. 5-10 words]"
+    "\n{description_tag}_1: [The formal museum description of image 1 in {language_name}. The description must be approx. **70-90 words** long and cover: 1. **Visual Identification** (material, technique, main motif). 2. **Context/Origin** (epoch, culture). 3. **Historical or Cultural Significance** (function, relevance). Avoid unnecessary filler text.]"
+    "\n{headline_tag}_2: [Title for image 2]"
+    "\n{description_tag}_2: [Description of image 2]"
+    "\n... and so on for every image."
+)
+
 # Mapping of keywords for parsing the Gemini response and selecting the target language
 LANGUAGE_MAPPING = {
     "Deutsch": ("TITEL", "BESCHREIBUNG"),
@@ -47,6 +76,58 @@ LANGUAGE_MAPPING = {
     "Lietuvių": ("ANTRAŠTĖ", "APRAŠYMAS")
 }
 
+# Uppercase, colon-terminated parse prefixes per tag pair, precomputed once at import
+_PARSE_TAGS = {
+    tags: (f'{tags[0].upper()}:', f'{tags[1].upper()}:')
+    for tags in LANGUAGE_MAPPING.values()
+}
+
+
+@dataclass(frozen=True)
+class PromptSet:
+    """Prompts and response tags for one target language, formatted once per run."""
+    language: str
+    headline_tag: str
+    description_tag: str
+    prompts: Dict[int, str]   # Ready-to-send prompt per number of images in a request
+
+
+def _build_prompts(language: str, max_images: int) -> PromptSet:
+    """Fills the prompt templates for the given language and every possible batch size."""
+    if language not in LANGUAGE_MAPPING:
+        raise ValueError(f"Unsupported language: {language}")
+    headline_tag, description_tag = LANGUAGE_MAPPING[language]
+
+    # A single image uses the plain template, several images the numbered batch variant
+    prompts = {
+        count: (CAPTION_PROMPT_TEMPLATE if count == 1 else BATCH_CAPTION_PROMPT_TEMPLATE).format(
+            language_name=language,
+            headline_tag=headline_tag,
+            description_tag=description_tag,
+            image_count=count
+        )
+        for count in range(1, max_images + 1)
+    }
+    return PromptSet(language, headline_tag, description_tag, prompts)
+
+# Supported image file extensions (lowercase; a tuple so it can be passed to str.endswith)
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# An image is referenced either by its file path or by a member of an open ZIP archive
+ImageSource = Union[str, Tuple[zipfile.ZipFile, zipfile.ZipInfo]]
+
+# Transient API errors (HTTP 429/500/503, timeouts) that are worth retrying
+TRANSIENT_API_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+)
+MAX_API_ATTEMPTS = 3        # Total number of attempts per API request
+RETRY_BASE_DELAY = 1.0      # Delay (in seconds) before the first retry, doubled for each further retry
+RETRY_MAX_DELAY = 8.0       # Upper bound for the backoff delay
+UPLOAD_REUSE_SECONDS = 47 * 3600  # Uploaded files expire after 48 h; older handles are uploaded again
+
 # Fallback captions for error cases (used as a default safety net)
 FALLBACK_CAPTIONS = [
     "a detailed scene with multiple visual elements and characters",
@@ -72,6 +153,172 @@ UNWANTED_PHRASES = [
     "nuotrauka vaizduoja", "čia matome", "tai yra"
 ]
 
+# Single case-insensitive pattern matching any unwanted phrase at the start of a caption,
+# including the punctuation and whitespace that follows it (compiled once at import)
+_UNWANTED_RE = re.compile(
+    r'^(?:' + '|'.join(re.escape(phrase) for phrase in UNWANTED_PHRASES) + r')\b[\s,:.]*',
+    re.IGNORECASE
+)
+
+
+# ==============================================================================
+# GEMINI CLIENT SETUP
+# ==============================================================================
+
+_CONFIGURED = False
+
+def _configure_gemini():
+    """Loads the API key and configures the Gemini client once per process."""
+    global _CONFIGURED
+    if _CONFIGURED:
+        return
+
+    # Load API key from a .env file
+    load_dotenv()
+    api_key = os.environ.get("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("GOOGLE_API_KEY not found in environment variables")
+
+    # Leave the transport at its default: the SDK then keeps one persistent gRPC channel
+    # per client, using grpc_asyncio for the async calls (forcing "grpc" would hand the
+    # async client a blocking transport)
+    genai.configure(api_key=api_key)
+    _CONFIGURED = True
+
+@functools.lru_cache(maxsize=4)
+def get_model(model_name: str) -> genai.GenerativeModel:
+    """Returns the shared GenerativeModel for the given name (created once per process)."""
+    _configure_gemini()
+    return genai.GenerativeModel(model_name)
+
+
+# ==============================================================================
+# RATE LIMITER
+# ==============================================================================
+
+class RateLimiter:
+    """
+    Spaces API requests evenly so that at most `max_requests_per_minute` requests
+    are started per minute. Unlike a fixed pause after every batch, time already
+    spent waiting for earlier responses counts towards the interval.
+    """
+
+    def __init__(self, max_requests_per_minute: float):
+        self.min_interval = 60.0 / max_requests_per_minute
+        self.next_allowed_time = 0.0
+
+    async def acquire(self):
+        """Waits until the next request is allowed to start."""
+        # Reserve the next slot before sleeping. There is no await between reading
+        # and updating next_allowed_time, so concurrent tasks cannot race here.
+        now = time.monotonic()
+        wait = self.next_allowed_time - now
+        self.next_allowed_time = max(now, self.next_allowed_time) + self.min_interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+# ==============================================================================
+# RESPONSE CACHE
+# ==============================================================================
+
+class CaptionCache:
+    """
+    Persistent SQLite cache that maps (image content, prompt, language, model)
+    to a generated headline and caption, so re-runs skip the API call entirely.
+    """
+
+    def __init__(self, db_path: str):
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS captions (key TEXT PRIMARY KEY, headline TEXT, caption TEXT)"
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def make_key(image_source: ImageSource, language: str, model_name: str) -> str:
+        """
+        Builds the cache key from the image bytes (streamed in 64 KiB chunks),
+        both prompt templates (single and batch requests), the language and the model name.
+        """
+        hasher = hashlib.blake2b(digest_size=16)
+        with _open_image_source(image_source) as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                hasher.update(chunk)
+        # Separate the text parts with NUL bytes so their boundaries stay unambiguous
+        for part in (CAPTION_PROMPT_TEMPLATE, BATCH_CAPTION_PROMPT_TEMPLATE, language, model_name):
+            hasher.update(b'\0' + part.encode('utf-8'))
+        return hasher.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[str, str]]:
+        """Returns the cached (headline, caption) pair or None on a cache miss."""
+        row = self.connection.execute(
+            "SELECT headline, caption FROM captions WHERE key = ?", (key,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def set(self, key: str, headline: str, caption: str):
+        """Stores a generated caption (committed immediately so it survives crashes)."""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO captions (key, headline, caption) VALUES (?, ?, ?)",
+            (key, headline, caption)
+        )
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+# ==============================================================================
+# IMAGE PREPROCESSING
+# ==============================================================================
+
+def _open_image_source(image_source: ImageSource) -> BinaryIO:
+    """Opens an image file, or an image member of a ZIP archive, for binary reading."""
+    if isinstance(image_source, tuple):
+        archive, member = image_source
+        return archive.open(member)
+    return open(image_source, 'rb')
+
+def _image_source_name(image_source: ImageSource) -> str:
+    """Returns the bare file name of an image source (as written to the output CSV)."""
+    if isinstance(image_source, tuple):
+        return os.path.basename(image_source[1].filename)
+    return os.path.basename(image_source)
+
+def _load_and_resize(image_source: ImageSource, max_image_size: Tuple[int, int]) -> Dict[str, Any]:
+    """
+    Opens an image, downsizes it to fit within max_image_size and re-encodes it
+    as an in-memory JPEG, returned as an inline image part for the Gemini API.
+    JPEGs that already fit are passed through unchanged.
+    Runs in a worker thread so decoding overlaps with pending API requests.
+    """
+    # Read the bytes into memory: seeking inside compressed ZIP members is slow
+    with _open_image_source(image_source) as f:
+        data = f.read()
+    # Image.open only parses the header here; pixels are decoded on first use
+    img = Image.open(io.BytesIO(data))
+
+    # A JPEG that already fits is sent as-is, without a decode/re-encode round-trip
+    fits = img.size[0] <= max_image_size[0] and img.size[1] <= max_image_size[1]
+    if fits and img.format == 'JPEG':
+        return {'mime_type': 'image/jpeg', 'data': data}
+
+    # Resize image if its dimensions exceed the maximum size
+    if not fits:
+        # Let libjpeg decode directly at 1/2, 1/4 or 1/8 scale where possible
+        # (no-op for other formats); the result still covers max_image_size
+        img.draft('RGB', max_image_size)
+        # Use LANCZOS resampling for high-quality downsampling; reducing_gap
+        # enables the fast box-reduce pre-step for large downscales
+        img.thumbnail(max_image_size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+    # Re-encode as JPEG (quality 85): far fewer bytes to upload than the
+    # lossless default serialization for photographic content
+    buffer = io.BytesIO()
+    img.convert('RGB').save(buffer, format='JPEG', quality=85, optimize=True)
+    return {'mime_type': 'image/jpeg', 'data': buffer.getvalue()}
+
 
 # ==============================================================================
 # GENERATOR CLASS
@@ -80,54 +327,73 @@ UNWANTED_PHRASES = [
 class GeminiCaptionGenerator:
     """Handles caption generation using the Google Gemini API."""
     
-    def __init__(self, model_name: str = "models/gemini-2.5-flash-lite-preview-06-17"):
-        # Load API key from a .env file
-        load_dotenv()
-        api_key = os.environ.get("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("GOOGLE_API_KEY not found in environment variables")
-        
-        # Configure the Gemini client
-        genai.configure(api_key=api_key)
+    def __init__(
+        self,
+        model_name: str = "models/gemini-2.5-flash-lite-preview-06-17",
+        max_requests_per_minute: float = 60.0,
+        cache_path: Optional[str] = None,
+        upload_threshold: Optional[int] = None
+    ):
+        # Shared, already configured model instance (one client/channel per process)
         self.model_name = model_name
-        self.model = genai.GenerativeModel(model_name)
+        self.model = get_model(model_name)
+        # Shared limiter for all requests issued by this generator
+        self.rate_limiter = RateLimiter(max_requests_per_minute)
+        # Optional persistent cache of previously generated captions
+        self.cache = CaptionCache(cache_path) if cache_path else None
+        # Worker threads for file hashing and image decoding (keeps the event loop free)
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        # Large images are uploaded once and then referenced by their File handle.
+        # Entries are (upload start time, pending upload); the Files API deletes uploads
+        # after 48 hours, so older handles are not reused (see UPLOAD_REUSE_SECONDS)
+        self.upload_threshold = upload_threshold
+        self.uploaded_files: Dict[str, Tuple[float, Any]] = {}
     
-    def generate_caption(
+    async def generate_captions_async(
         self,
-        image_path: str,
-        language: str,  # Target language passed as a parameter
+        image_sources: List[ImageSource],
+        prompts: PromptSet,  # Pre-formatted prompts and tags for the target language
         max_image_size: Tuple[int, int] = (2000, 2000)
-    ) -> Optional[Tuple[str, str]]:
+    ) -> List[Optional[Tuple[str, str]]]:
         """
-        Generates a headline and detailed caption for an image using the Gemini API.
+        Generates a headline and detailed caption for each image using the Gemini API.
+        All images that are not cached yet are sent together in a single request.
+        Returns one (headline, caption) pair per image, or None where generation failed.
         """
+        loop = asyncio.get_running_loop()
+        results: List[Optional[Tuple[str, str]]] = [None] * len(image_sources)
         try:
-            # 1. Image Preprocessing
-            img = Image.open(image_path)
-            
-            # Resize image if its dimensions exceed the maximum size
-            if img.size[0] > max_image_size[0] or img.size[1] > max_image_size[1]:
-                # Use LANCZOS resampling for high-quality downsampling
-                img.thumbnail(max_image_size, Image.Resampling.LANCZOS)
-            
-            # 2. Dynamic Prompt Formatting
-            if language not in LANGUAGE_MAPPING:
-                raise ValueError(f"Unsupported language: {language}")
-                
-            headline_tag, description_tag = LANGUAGE_MAPPING[language]
+            # 0. Cache Lookup (skips the API call for already captioned images)
+            cache_keys: List[Optional[str]] = [None] * len(image_sources)
+            if self.cache:
+                cache_keys = await asyncio.gather(*(
+                    loop.run_in_executor(
+                        self.executor, CaptionCache.make_key, source, prompts.language, self.model_name
+                    )
+                    for source in image_sources
+                ))
+                for i, cache_key in enumerate(cache_keys):
+                    results[i] = self.cache.get(cache_key)
+            pending = [i for i, result in enumerate(results) if result is None]
+            if not pending:
+                return results
+
+            # 1. Image Preprocessing (decoded in worker threads while other requests are in flight)
+            images = await asyncio.gather(*(
+                loop.run_in_executor(self.executor, _load_and_resize, image_sources[i], max_image_size)
+                for i in pending
+            ))
+            if self.upload_threshold is not None:
+                images = await asyncio.gather(*(self._upload_if_large(image) for image in images))
             
-            # Fill the template with specific language tags and target language name
-            dynamic_prompt = CAPTION_PROMPT_TEMPLATE.format(
-                language_name=language,
-                headline_tag=headline_tag,
-                description_tag=description_tag
-            )
+            # 2. Prompt Selection (pre-formatted for this language and batch size)
+            dynamic_prompt = prompts.prompts[len(images)]
             
-            # 3. API Call
-            response = self.model.generate_content(
-                [dynamic_prompt, img],
+            # 3. API Call (retried on transient errors)
+            response = await self._generate_with_retry(
+                [dynamic_prompt, *images],
                 generation_config={
-                    "max_output_tokens": 250, # Set max output length
+                    "max_output_tokens": 250 * len(images), # Set max output length (per image)
                     "temperature": 0.4,       # Lower temperature for more formal/factual output
                     "top_p": 0.9,
                     "top_k": 40
@@ -135,59 +401,142 @@ class GeminiCaptionGenerator:
             )
             
             # 4. Extract Raw Text from Response (robust handling)
-            caption_text = None
-            
-            # Method 1: Direct text attribute (most common)
-            if hasattr(response, 'text'):
-                try:
-                    caption_text = response.text
-                except Exception:
-                    pass
-            
-            # Method 2: Extract from candidates structure (fallback for robust error handling)
-            if not caption_text and hasattr(response, 'candidates') and response.candidates:
-                try:
-                    candidate = response.candidates[0]
-                    if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
-                        parts_text = [part.text for part in candidate.content.parts if hasattr(part, 'text')]
-                        if parts_text:
-                            caption_text = ''.join(parts_text)
-                except Exception:
-                    pass
-            
-            if caption_text and caption_text.strip():
-                # Pass the language-specific tags to the parsing function
-                return self._parse_response(caption_text, headline_tag, description_tag)
-            
-            return None
+            caption_text = self._extract_text(response)
+            if not caption_text or not caption_text.strip():
+                return results
+
+            # Pass the language-specific tags to the parsing function
+            if len(images) == 1:
+                parsed = [self._parse_response(caption_text, prompts.headline_tag, prompts.description_tag)]
+            else:
+                parsed = self._parse_batch_response(
+                    caption_text, prompts.headline_tag, prompts.description_tag, len(images)
+                )
+
+            for i, result in zip(pending, parsed):
+                results[i] = result
+                # Only complete parses are cached; missing tags stay None and are retried next run
+                if result and self.cache:
+                    self.cache.set(cache_keys[i], *result)
+            return results
             
         except Exception as e:
             # Log any exceptions during image opening, resizing, or API communication
-            print(f"  Error generating caption: {e}")
+            logger.error("  Error generating caption: %s", e)
+            return results
+
+    async def warm_up(self):
+        """
+        Opens the API connection (DNS, TLS, HTTP/2 setup) with a free count_tokens call,
+        so the first caption request does not pay the connection cost.
+        """
+        try:
+            await self.model.count_tokens_async("ping")
+        except Exception as e:
+            # Not fatal: the first real request simply opens the connection itself
+            logger.debug("Connection warm-up failed: %s", e)
+
+    async def _upload_if_large(self, image: Dict[str, Any]) -> Any:
+        """
+        Replaces an inline image part above upload_threshold by a Files API handle, so
+        its bytes are uploaded once instead of being base64-inlined into every request.
+        Identical images share one upload; each upload counts against the rate limit.
+        """
+        if len(image['data']) <= self.upload_threshold:
+            return image
+        digest = hashlib.blake2b(image['data'], digest_size=16).hexdigest()
+        entry = self.uploaded_files.get(digest)
+        if entry is None or time.monotonic() - entry[0] > UPLOAD_REUSE_SECONDS:
+            # Store the pending upload first so concurrent requests for the same image wait for it
+            upload = asyncio.ensure_future(self._upload(image))
+            self.uploaded_files[digest] = entry = (time.monotonic(), upload)
+        try:
+            return await entry[1]
+        except Exception as e:
+            # Forget the failed upload (a later request may retry it) and send this one inline
+            self.uploaded_files.pop(digest, None)
+            logger.warning("Upload failed, sending image inline instead: %s", e)
+            return image
+
+    async def _upload(self, image: Dict[str, Any]) -> Any:
+        """Uploads one image through the Files API (paced like the caption requests)."""
+        await self.rate_limiter.acquire()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            functools.partial(genai.upload_file, io.BytesIO(image['data']), mime_type=image['mime_type'])
+        )
+
+    @staticmethod
+    def _extract_text(response) -> Optional[str]:
+        """
+        Extracts the raw response text. The common single-part answer is read
+        directly from the first candidate; response.text is only the fallback.
+        """
+        try:
+            parts = response.candidates[0].content.parts
+            # Fast path: exactly one text part (the usual case)
+            if len(parts) == 1:
+                return parts[0].text
+            # Multi-part answer: join all text parts
+            parts_text = [part.text for part in parts if hasattr(part, 'text')]
+            if parts_text:
+                return ''.join(parts_text)
+        except (IndexError, AttributeError, TypeError):
+            pass
+        
+        # Fallback: SDK convenience property (raises if the response was blocked)
+        try:
+            return getattr(response, 'text', None)
+        except Exception:
             return None
     
+    async def _generate_with_retry(self, contents: list, generation_config: dict):
+        """
+        Calls the Gemini API and retries transient errors (rate limits, overload,
+        timeouts) with exponential backoff and jitter. Any other error, or a
+        transient error on the final attempt, is raised to the caller.
+        """
+        for attempt in range(MAX_API_ATTEMPTS):
+            # Every attempt counts against the rate limit
+            await self.rate_limiter.acquire()
+            try:
+                return await self.model.generate_content_async(contents, generation_config=generation_config)
+            except TRANSIENT_API_ERRORS as e:
+                if attempt == MAX_API_ATTEMPTS - 1:
+                    raise
+                delay = min(RETRY_BASE_DELAY * 2 ** attempt, RETRY_MAX_DELAY) + random.uniform(0, 0.3)
+                logger.warning("  Transient API error (%s), retrying in %.1fs...", type(e).__name__, delay)
+                await asyncio.sleep(delay)
+
     @staticmethod
-    def _parse_response(text: str, expected_headline_tag: str, expected_description_tag: str) -> Tuple[str, str]:
+    def _parse_response(text: str, expected_headline_tag: str, expected_description_tag: str) -> Optional[Tuple[str, str]]:
         """
         Parses the raw API response text to extract the headline and description
-        based on the expected language-specific tags.
+        based on the expected language-specific tags. Returns None if either part
+        is missing, so the caller falls back and the answer is not cached.
         """
         lines = text.strip().split('\n')
         headline = ""
         description = ""
         
-        # Prepare case-insensitive, colon-appended tags for parsing
-        headline_prefix = f'{expected_headline_tag.upper()}:'
-        description_prefix = f'{expected_description_tag.upper()}:'
+        # Case-insensitive, colon-appended tags for parsing (precomputed for known languages)
+        headline_prefix, description_prefix = _PARSE_TAGS.get(
+            (expected_headline_tag, expected_description_tag),
+            (f'{expected_headline_tag.upper()}:', f'{expected_description_tag.upper()}:')
+        )
+        prefix_length = max(len(headline_prefix), len(description_prefix))
         
         for line in lines:
             line = line.strip()
+            # Uppercase only the start of the line, where a tag can appear
+            line_start = line[:prefix_length].upper()
             # Check for Headline tag
-            if line.upper().startswith(headline_prefix):
+            if line_start.startswith(headline_prefix):
                 # Extract text after the tag
                 headline = line[len(headline_prefix):].strip()
             # Check for Description tag
-            elif line.upper().startswith(description_prefix):
+            elif line_start.startswith(description_prefix):
                 # Extract text after the tag
                 description = line[len(description_prefix):].strip()
             # Fallback: If a headline was found but no description tag yet, treat the next line as description.
@@ -197,28 +546,52 @@ class GeminiCaptionGenerator:
             elif description:
                 description += " " + line
         
+        if not headline or not description:
+            return None
         # Clean both extracted parts
-        headline = GeminiCaptionGenerator._clean_caption(headline) if headline else "Untitled Scene"
-        description = GeminiCaptionGenerator._clean_caption(description) if description else random.choice(FALLBACK_CAPTIONS)
-        
-        return headline, description
+        return GeminiCaptionGenerator._clean_caption(headline), GeminiCaptionGenerator._clean_caption(description)
+    
+    @staticmethod
+    def _parse_batch_response(
+        text: str, expected_headline_tag: str, expected_description_tag: str, image_count: int
+    ) -> List[Optional[Tuple[str, str]]]:
+        """
+        Splits a multi-image response into one (headline, description) pair per image
+        using the numbered tags (e.g. HEADLINE_2 / DESCRIPTION_2). Images missing either
+        tagged part get None so the caller can fall back (as in _parse_response).
+        """
+        tag_pattern = re.compile(
+            rf'^[ \t]*({re.escape(expected_headline_tag)}|{re.escape(expected_description_tag)})_(\d+):',
+            re.IGNORECASE | re.MULTILINE
+        )
+        headline_tag = expected_headline_tag.upper()
+
+        # Collect the (whitespace-normalized) text following each numbered tag
+        sections = {}
+        matches = list(tag_pattern.finditer(text))
+        for match, next_match in zip(matches, matches[1:] + [None]):
+            section_end = next_match.start() if next_match else len(text)
+            is_headline = match.group(1).upper() == headline_tag
+            sections[(is_headline, int(match.group(2)))] = " ".join(text[match.end():section_end].split())
+
+        results: List[Optional[Tuple[str, str]]] = []
+        for number in range(1, image_count + 1):
+            headline = sections.get((True, number), "")
+            description = sections.get((False, number), "")
+            if not headline or not description:
+                results.append(None)
+                continue
+            # Clean both extracted parts
+            results.append((
+                GeminiCaptionGenerator._clean_caption(headline), GeminiCaptionGenerator._clean_caption(description)
+            ))
+        return results
     
     @staticmethod
     def _clean_caption(text: str) -> str:
         """Cleans and normalizes caption text by removing unwanted phrases and punctuation."""
-        caption = text.strip()
-        
-        # Remove unwanted leading phrases (case-insensitive)
-        caption_lower = caption.lower()
-        for phrase in UNWANTED_PHRASES:
-            if caption_lower.startswith(phrase):
-                # Find the index of the phrase in the original text to maintain case
-                original_phrase = caption[caption_lower.find(phrase):caption_lower.find(phrase) + len(phrase)]
-                # Slice the original text to remove the phrase
-                caption = caption[len(original_phrase):].strip()
-                caption_lower = caption.lower() # Update for further checks
-                # Remove leading punctuation after phrase removal
-                caption = caption.lstrip(',:.')
+        # Remove an unwanted leading phrase and the punctuation after it (case-insensitive)
+        caption = _UNWANTED_RE.sub('', text.strip(), count=1).strip()
         
         # Remove trailing punctuation (commas, periods, etc.)
         caption = caption.rstrip('.,;!?')
@@ -239,10 +612,197 @@ class ImageProcessor:
     
     def __init__(self, config: ProcessingConfig):
         self.config = config
-        self.generator = GeminiCaptionGenerator()
+        self.generator = GeminiCaptionGenerator(
+            max_requests_per_minute=config.max_requests_per_minute,
+            cache_path=config.cache_path,
+            upload_threshold=config.upload_threshold
+        )
+        # Format the prompts once for the configured language instead of once per request
+        self.prompts = _build_prompts(config.language, max(1, config.images_per_request))
     
-    def process(self) -> Tuple[int, int]:
+    async def process_async(self) -> Tuple[int, int]:
         """
         Main method to process all images and generate captions.
+        Returns the number of successful and fallback captions.
         """
-        # Use a temporary directory for
\ No newline at end of file
+        # Establish the API connection while the input is being scanned
+        warm_up = asyncio.create_task(self.generator.warm_up())
+        try:
+            # ZIP archives stay open while processing; members are read in place
+            with self._prepare_images() as archive:
+                if archive is not None:
+                    image_files = self._find_zip_images(archive)
+                else:
+                    image_files = self._find_images(self.config.input_path)
+                if not image_files:
+                    logger.warning("No images found. Check the input path.")
+                    return 0, 0
+
+                # Resume support: skip images already listed in an existing output CSV
+                completed = self._load_completed_images()
+                if completed is not None:
+                    image_files = [f for f in image_files if _image_source_name(f) not in completed]
+                    logger.info("Resuming: %d images already captioned in '%s'.", len(completed), self.config.output_csv)
+                    if not image_files:
+                        logger.info("All images have already been captioned.")
+                        return 0, 0
+
+                logger.info("Found %d images to process.", len(image_files))
+                await warm_up
+                return await self._process_images_async(image_files, append=completed is not None)
+        finally:
+            # Early returns leave the warm-up unneeded
+            warm_up.cancel()
+            self.generator.executor.shutdown()
+            if self.generator.cache:
+                self.generator.cache.close()
+
+    def _load_completed_images(self) -> Optional[set]:
+        """
+        Returns the image file names already present in the output CSV, or None
+        if there is no existing output to resume from.
+        """
+        if not os.path.exists(self.config.output_csv):
+            return None
+        with open(self.config.output_csv, newline="", encoding="utf-8") as file:
+            reader = csv.DictReader(file)
+            if not reader.fieldnames or "image_file" not in reader.fieldnames:
+                return None
+            return {row["image_file"] for row in reader}
+
+    def _prepare_images(self):
+        """
+        Returns a context manager yielding the open ZIP archive, or None if the
+        input is a directory. Archive members are decoded straight from the
+        archive, so nothing is extracted to disk.
+        """
+        if zipfile.is_zipfile(self.config.input_path):
+            logger.info("Reading ZIP archive: %s", self.config.input_path)
+            return zipfile.ZipFile(self.config.input_path, 'r')
+        return contextlib.nullcontext()
+
+    @staticmethod
+    def _find_zip_images(archive: zipfile.ZipFile) -> List[ImageSource]:
+        """Collects all supported image members of a ZIP archive (sorted by path)."""
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS)
+        ]
+        return [(archive, info) for info in sorted(members, key=lambda info: info.filename)]
+
+    @staticmethod
+    def _find_images(directory: str) -> List[str]:
+        """Recursively collects all supported image files (sorted by path)."""
+        def walk(path: str):
+            # os.scandir returns the entry type with the name, so no extra stat calls are needed
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        yield from walk(entry.path)
+                    # Only process common image file types
+                    elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                        yield entry.path
+        return sorted(walk(directory))
+
+    async def _caption_batch(
+        self, semaphore: asyncio.Semaphore, image_sources: List[ImageSource]
+    ) -> Tuple[List[ImageSource], List[Optional[Tuple[str, str]]]]:
+        """Generates the captions for one batch of images while holding a concurrency slot."""
+        async with semaphore:
+            results = await self.generator.generate_captions_async(
+                image_sources, self.prompts, self.config.max_image_size
+            )
+        return image_sources, results
+
+    async def _process_images_async(self, image_files: List[ImageSource], append: bool = False) -> Tuple[int, int]:
+        """
+        Dispatches the caption requests concurrently (bounded by max_concurrency),
+        with up to images_per_request images per request, and writes every result
+        to the CSV as soon as it arrives. With append=True the rows are added to an
+        existing output CSV (resumed run).
+        """
+        semaphore = asyncio.Semaphore(self.config.max_concurrency)
+        batch_size = max(1, self.config.images_per_request)
+        tasks = [
+            asyncio.create_task(self._caption_batch(semaphore, image_files[start:start + batch_size]))
+            for start in range(0, len(image_files), batch_size)
+        ]
+
+        successful, failed = 0, 0
+        total = len(image_files)
+        # 1 MiB buffer: the rows of a batch reach the file in a single write at the flush below
+        with open(
+            self.config.output_csv, "a" if append else "w", newline="", encoding="utf-8", buffering=1024 * 1024
+        ) as file:
+            writer = csv.writer(file)
+            # Bind hot-loop methods once instead of looking them up per row
+            write_row, flush, file_no = writer.writerow, file.flush, file.fileno()
+            # Write the standardized CSV header (an existing file already has one)
+            if not append:
+                write_row(["headline", "caption", "image_file"])
+
+            # Batches are written in arrival order, not in file order
+            idx = 0
+            for finished in asyncio.as_completed(tasks):
+                image_sources, results = await finished
+                for image_source, result in zip(image_sources, results):
+                    idx += 1
+                    image_name = _image_source_name(image_source)
+
+                    if result:
+                        headline, caption = result
+                        successful += 1
+                        logger.info("✅ [%d/%d] %s -> %s", idx, total, image_name, headline)
+                    else:
+                        # Use a fallback caption so every image gets a row in the CSV
+                        headline, caption = "Untitled Scene", random.choice(FALLBACK_CAPTIONS)
+                        failed += 1
+                        logger.warning("⚠️  [%d/%d] %s -> fallback caption used", idx, total, image_name)
+
+                    write_row([headline, caption, image_name])
+                # Persist every batch immediately: an API call takes seconds, so the
+                # fsync cost is negligible and a crash loses no finished captions
+                flush()
+                os.fsync(file_no)
+
+        return successful, failed
+
+
+def get_user_input() -> ProcessingConfig:
+    """Collects necessary configuration and file paths from the user."""
+    print("\nMUSEUM IMAGE CAPTION GENERATOR")
+    print("=" * 70)
+
+    # Input prompts with defaults
+    input_path = input("Enter path to a folder or ZIP file with your images: ").strip()
+    output_csv = input("Output CSV filename (default: caption.csv): ").strip() or "caption.csv"
+    lang_input = input(f"Select language ({', '.join(LANGUAGE_MAPPING)}) [Deutsch]: ").strip() or "Deutsch"
+
+    # Normalize language input
+    lang = next((l for l in LANGUAGE_MAPPING if l.lower() == lang_input.lower()), "Deutsch")
+
+    return ProcessingConfig(input_path=input_path, output_csv=output_csv, language=lang)
+
+def main():
+    """Main execution function."""
+    # Plain message output; raise the level to logging.WARNING to hide per-image progress
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    try:
+        config = get_user_input()
+        if not os.path.exists(config.input_path):
+            logger.error("❌ ERROR: The input path '%s' was not found.", config.input_path)
+            return
+
+        logger.info("\n" + "=" * 70 + "\nSTARTING PROCESSING...\n" + "=" * 70)
+
+        processor = ImageProcessor(config)
+        successful, failed = asyncio.run(processor.process_async())
+
+        logger.info("\n" + "=" * 70 + "\nPROCESSING COMPLETE\n" + "=" * 70)
+        logger.info("Generated captions: %d | Fallback captions: %d", successful, failed)
+        logger.info("Captions saved to: %s", config.output_csv)
+    except Exception as e:
+        logger.exception("An unexpected error occurred: %s", e)
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,21 @@ Museum Object Description & Categorization GUI
 A user-friendly application for generating object descriptions and primary categories
 with drag-and-drop functionality, powered by Gemini AI and a CSV data source.
 """
+import io
 import os
 import csv
 import time
+import asyncio
+import hashlib
+import heapq
+import sqlite3
 import pandas as pd
 import threading
 import queue
-from pathlib import Path
 from collections import defaultdict
 from typing import Optional, List, Tuple, Dict
 from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
 
 # GUI Libraries
 import customtkinter as ctk
@@ -25,6 +30,8 @@ import google.generativeai as genai
 from dotenv import load_dotenv
 from PIL import Image
 
+from object_ids import id_prefix
+
 # ==============================================================================
 # 1. BACKEND LOGIC (Core Processing Components)
 # ==============================================================================
@@ -61,91 +68,233 @@ CAPTION_PROMPT_TEMPLATE = (
     "\n{description_tag}: [The formal museum description, approx. 70-90 words.]"
     "\n{category_tag}: [Your chosen category from the list]"
 )
+# API pacing: at most REQUESTS_PER_WINDOW request starts per RATE_WINDOW_SECONDS, spread evenly
+MAX_CONCURRENT_REQUESTS = 5
+REQUESTS_PER_WINDOW = 5
+RATE_WINDOW_SECONDS = 25.0
+
+# SQLite file memoizing generated results across runs (keyed by prompt and image bytes)
+CACHE_PATH = "gui_description_cache.sqlite"
+
 # Add the new CATEGORY tag to the language mapping
 LANGUAGE_MAPPING = {
     "Deutsch": ("TITEL", "BESCHREIBUNG", "KATEGORIE"), 
     "English": ("HEADLINE", "DESCRIPTION", "CATEGORY")
 }
 
+# The prompt with the language and tags already filled in; only the object's database fields remain per call
+_PROMPT_BY_LANGUAGE = {
+    language: CAPTION_PROMPT_TEMPLATE
+    .replace("{language_name}", language)
+    .replace("{headline_tag}", headline_tag)
+    .replace("{description_tag}", description_tag)
+    .replace("{category_tag}", category_tag)
+    for language, (headline_tag, description_tag, category_tag) in LANGUAGE_MAPPING.items()
+}
+
 
 def load_and_prepare_data(csv_path: str, log_queue: queue.Queue) -> Dict:
     """Loads CSV metadata, cleans 't1' column, and creates a lookup map."""
     try:
-        df = pd.read_csv(csv_path, dtype=str).fillna("N/A")
-        data_map = {}
+        # Parse with the multithreaded Arrow reader into Arrow-backed string columns
+        df = pd.read_csv(csv_path, engine="pyarrow", dtype="string[pyarrow]").fillna("N/A")
         df['cleaned_t1'] = df['t1'].str.strip()
         df['lookup_key'] = df['cleaned_t1'].str.replace('/', '-', regex=False).str.split(' ').str[0]
         df_unique = df.drop_duplicates(subset='lookup_key', keep='first')
-        for _, row in df_unique.iterrows():
-            key = row['lookup_key']
-            data_map[key] = {
-                "material": row.get('T3', 'N/A'), "dimensions": row.get('T5', 'N/A'),
-                "date": row.get('T14', 'N/A')
-            }
+        # One conversion to {lookup_key: {material, dimensions, date}} (missing columns become "N/A")
+        data_map = (
+            df_unique.set_index('lookup_key')
+            .reindex(columns=['T3', 'T5', 'T14'], fill_value='N/A')
+            .rename(columns={'T3': 'material', 'T5': 'dimensions', 'T14': 'date'})
+            .to_dict(orient='index')
+        )
         log_queue.put(f"✅ CSV data successfully loaded for {len(data_map)} objects.")
         return data_map
     except Exception as e:
         log_queue.put(f"❌ ERROR processing CSV: {e}")
         return {}
 
+# Shared worker threads for image decoding/resizing, so PIL never blocks the event loop
+IMAGE_EXECUTOR = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4))
+
+def _thumb_bytes(path: str, size: Tuple[int, int]) -> bytes:
+    """
+    Returns the image shrunk to fit size as JPEG bytes (runs in IMAGE_EXECUTOR).
+    JPEGs that already fit are passed through unchanged. Not memoized: reruns are
+    answered by ResponseCache, and a replaced file must never reuse the old bytes.
+    """
+    with Image.open(path) as img:
+        if img.format == 'JPEG' and img.size[0] <= size[0] and img.size[1] <= size[1]:
+            with open(path, 'rb') as f:
+                return f.read()
+        # Decode JPEGs directly at 1/2, 1/4 or 1/8 scale where that still covers size
+        # (no-op for other formats); bilinear is enough for images sent to the API
+        img.draft('RGB', size)
+        img.thumbnail(size, Image.Resampling.BILINEAR)
+        buffer = io.BytesIO()
+        img.convert('RGB').save(buffer, format='JPEG', quality=85)
+    return buffer.getvalue()
+
+class ResponseCache:
+    """Persistent memo of (headline, description, category) keyed by a BLAKE2b digest of prompt and images."""
+    def __init__(self, db_path: str):
+        # Opened, used and closed by the processing thread only
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, headline TEXT, description TEXT, category TEXT)")
+        self.connection.commit()
+
+    @staticmethod
+    def make_key(prompt: str, image_paths: List[str]) -> str:
+        """Digest of the prompt followed by the bytes of the sorted images (streamed in 64 KiB chunks)."""
+        hasher = hashlib.blake2b(prompt.encode('utf-8'), digest_size=16)
+        for path in sorted(image_paths):
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(65536), b''):
+                    hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[str, str, str]]:
+        row = self.connection.execute("SELECT headline, description, category FROM responses WHERE key = ?", (key,)).fetchone()
+        return tuple(row) if row else None
+
+    def set(self, key: str, result: Tuple[str, str, str]):
+        self.connection.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, *result))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
 class GeminiProcessor:
     """Handles communication with the Gemini API for content generation."""
     def __init__(self):
         load_dotenv()
         api_key = os.environ.get("GOOGLE_API_KEY")
         if not api_key: raise ValueError("API Key not found in environment variables!")
+        # Default transport: the async calls share one persistent grpc_asyncio channel
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("models/gemini-2.5-flash-lite-preview-06-17")
+        self.model_name = "models/gemini-2.5-flash-lite-preview-06-17"
+        self.model = genai.GenerativeModel(self.model_name)
+        self.cache = ResponseCache(CACHE_PATH)
+        # API pacing: request starts are spaced evenly instead of sending 5 at once and then pausing 25s
+        self.interval = RATE_WINDOW_SECONDS / REQUESTS_PER_WINDOW
+        self.next_start = time.monotonic()
 
-    def generate_description_and_category(self, image_paths: List[str], object_data: Dict[str, str], language: str) -> Tuple[Optional[str], str, str]:
-        """Sends images and the formatted prompt to the Gemini API."""
+    async def _wait_for_request_slot(self):
+        """Waits until the next evenly spaced request start (only API calls take a slot)."""
+        now = time.monotonic()
+        start = max(now, self.next_start)
+        self.next_start = start + self.interval
+        if start > now: await asyncio.sleep(start - now)
+
+    async def warm_up(self):
+        """Opens the API connection with a free count_tokens call before the first real request."""
+        try:
+            await self.model.count_tokens_async("ping")
+        except Exception:
+            # Not fatal: the first real request simply opens the connection itself
+            pass
+
+    async def generate_description_and_category(self, image_paths: List[str], object_data: Dict[str, str], language: str) -> Tuple[Optional[str], str, str]:
+        """Sends images and the formatted prompt to the Gemini API (awaits without blocking other requests)."""
         try:
-            images = []
-            for p in image_paths:
-                img = Image.open(p)
-                img.thumbnail((2000, 2000))
-                images.append(img)
-            
             headline_tag, description_tag, category_tag = LANGUAGE_MAPPING[language]
-            prompt = CAPTION_PROMPT_TEMPLATE.format(
-                language_name=language, headline_tag=headline_tag, description_tag=description_tag, category_tag=category_tag,
-                **object_data
-            )
+            prompt = _PROMPT_BY_LANGUAGE[language].format(**object_data)
             
-            response = self.model.generate_content([prompt, *images])
-            return self._parse_response(response.text, headline_tag, description_tag, category_tag)
+            # Unchanged prompt, model and images: reuse the stored result instead of calling the API
+            loop = asyncio.get_running_loop()
+            cache_key = await loop.run_in_executor(IMAGE_EXECUTOR, ResponseCache.make_key, self.model_name + prompt, image_paths)
+            cached = self.cache.get(cache_key)
+            if cached: return cached
+            
+            images = [
+                {'mime_type': 'image/jpeg', 'data': data}
+                for data in await asyncio.gather(*[
+                    loop.run_in_executor(IMAGE_EXECUTOR, _thumb_bytes, p, (2000, 2000)) for p in image_paths
+                ])
+            ]
+            
+            # Cache hits return above without waiting, so only real API calls are paced
+            await self._wait_for_request_slot()
+            response = await self.model.generate_content_async([prompt, *images])
+            headline, description, category = self._parse_response(response.text, headline_tag, description_tag, category_tag)
+            result = (headline or "Untitled", description or "Description not available.", category or "Uncategorized")
+            # Only complete answers are stored; a response with missing tags is requested again next run
+            if headline and description and category: self.cache.set(cache_key, result)
+            return result
         except Exception as e:
             return (None, str(e), "Error")
 
     @staticmethod
     def _parse_response(text: str, h_tag: str, d_tag: str, c_tag: str) -> Tuple[str, str, str]:
-        """Robustly parses the model's response to extract headline, description, and category."""
+        """
+        Robustly parses the model's response to extract headline, description, and category
+        (an empty string for each tag that was not found).
+        """
         headline, description, category, in_description = "", "", "", False
         
         h_prefix = f'{h_tag.upper()}:'
         d_prefix = f'{d_tag.upper()}:'
         c_prefix = f'{c_tag.upper()}:'
+        prefix_length = max(len(h_prefix), len(d_prefix), len(c_prefix))
         
         for line in text.strip().split('\n'):
             stripped = line.strip()
             if not stripped: continue
             
-            if stripped.upper().startswith(h_prefix):
+            # Uppercase only the start of the line (once), where a tag can appear
+            line_start = stripped[:prefix_length].upper()
+            if line_start.startswith(h_prefix):
                 headline = stripped[len(h_prefix):].strip()
                 in_description = False
-            elif stripped.upper().startswith(d_prefix):
+            elif line_start.startswith(d_prefix):
                 description = stripped[len(d_prefix):].strip()
                 in_description = True
-            elif stripped.upper().startswith(c_prefix):
+            elif line_start.startswith(c_prefix):
                 category = stripped[len(c_prefix):].strip()
                 in_description = False
             elif in_description:
                 description += " " + stripped
                 
-        return headline or "Untitled", description.strip() or "Description not available.", category or "Uncategorized"
+        return headline, description.strip(), category
+
+async def process_groups_async(generator: GeminiProcessor, image_groups: Dict[str, List[str]], data_map: Dict,
+                               language: str, writer, log_queue: queue.Queue):
+    """Generates all objects concurrently and writes each row as soon as its object is finished."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    total_objects = len(image_groups)
+
+    async def describe(object_id: str, image_files: List[str]):
+        lookup_key = id_prefix(object_id, 3)
+        # Copy, so concurrent objects sharing a lookup key do not overwrite each other's ID
+        object_data = dict(data_map.get(lookup_key, {}), object_id=object_id)
+        files_to_process = heapq.nsmallest(4, image_files)
+        async with semaphore:
+            log_queue.put(f"Processing ID: {object_id} ({len(files_to_process)} images)...")
+            result = await generator.generate_description_and_category(files_to_process, object_data, language)
+        return object_id, object_data, result
+
+    # Open the API connection (TLS handshake) before the requests start; all requests then share it
+    await generator.warm_up()
+    tasks = [asyncio.create_task(describe(object_id, image_files)) for object_id, image_files in image_groups.items()]
+    for idx, task in enumerate(asyncio.as_completed(tasks), 1):
+        object_id, object_data, (result, description, category) = await task
+        
+        if result is None:
+            headline = "Error"
+            log_queue.put(f"[{idx}/{total_objects}] {object_id} -> ❌ Error: {description}")
+        else:
+            headline = result
+            log_queue.put(f"[{idx}/{total_objects}] {object_id} -> ✅ Category: {category} | Headline: {headline}")
+
+        writer.writerow([
+            object_id, category, headline, description,
+            object_data.get('material', 'N/A'), object_data.get('date', 'N/A'),
+            object_data.get('dimensions', 'N/A')
+        ])
 
 def run_processing_logic(config: ProcessingConfig, log_queue: queue.Queue):
     """The main thread function executed separately from the GUI."""
+    generator = None
     try:
         log_queue.put("="*50 + "\nStep 1: Loading and processing CSV data...")
         data_map = load_and_prepare_data(config.csv_path, log_queue)
@@ -153,54 +302,28 @@ def run_processing_logic(config: ProcessingConfig, log_queue: queue.Queue):
 
         log_queue.put("\n" + "="*50 + "\nStep 2: Scanning image folder and creating groups...")
         image_groups = defaultdict(list)
-        for filename in os.listdir(config.input_path):
-            if Path(filename).suffix.lower() in {".jpg", ".jpeg", ".png"}:
-                try:
-                    object_id = '-'.join(filename.split('-')[:4])
-                    image_groups[object_id].append(os.path.join(config.input_path, filename))
-                except IndexError: continue
+        with os.scandir(config.input_path) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith((".jpg", ".jpeg", ".png")) and entry.is_file():
+                    object_id = id_prefix(entry.name, 4)
+                    image_groups[object_id].append(entry.path)
         log_queue.put(f"✅ Found {len(image_groups)} object groups.")
 
         log_queue.put("\n" + "="*50 + "\nStep 3: Generating descriptions and categories with AI...")
         generator = GeminiProcessor()
-        total_objects = len(image_groups)
         
         with open(config.output_path, "w", newline="", encoding="utf-8") as file:
             writer = csv.writer(file)
             # Add the new category column to the header
             writer.writerow(["object_id", "primary_category", "headline", "description", "material", "date", "dimensions"])
-            
-            for idx, (object_id, image_files) in enumerate(image_groups.items(), 1):
-                lookup_key = '-'.join(object_id.split('-')[:3])
-                object_data = data_map.get(lookup_key, {})
-                object_data['object_id'] = object_id
-
-                files_to_process = sorted(image_files)[:4]
-                log_queue.put(f"[{idx}/{total_objects}] Processing ID: {object_id} ({len(files_to_process)} images)...")
-                
-                result, description, category = generator.generate_description_and_category(files_to_process, object_data, config.language)
-                
-                if result is None:
-                    headline = "Error"
-                    log_queue.put(f"  -> ❌ Error: {description}")
-                else:
-                    headline = result
-                    log_queue.put(f"  -> ✅ Category: {category} | Headline: {headline}")
-
-                writer.writerow([
-                    object_id, category, headline, description,
-                    object_data.get('material', 'N/A'), object_data.get('date', 'N/A'),
-                    object_data.get('dimensions', 'N/A')
-                ])
-
-                if idx % 5 == 0 and idx < total_objects:
-                    log_queue.put(f"  ... short pause (25s) to comply with API rate limits ...")
-                    time.sleep(25)
+            asyncio.run(process_groups_async(generator, image_groups, data_map, config.language, writer, log_queue))
         
         log_queue.put("\n" + "="*50 + f"\n✅ Processing finished! Data saved to '{config.output_path}'.")
     except Exception as e:
         log_queue.put(f"\n❌ A CRITICAL ERROR OCCURRED: {e}")
     finally:
+        # Each run opens its own cache connection, so close it before the thread ends
+        if generator: generator.cache.close()
         log_queue.put("FINISHED")
 
 
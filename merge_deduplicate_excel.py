@@ -1,4 +1,5 @@
 import pandas as pd
+import sys
 from pathlib import Path
 
 # --- Configuration Section ---
@@ -28,14 +29,37 @@ all_dataframes = []
 
 print("Starting the data cleaning and merging process...")
 
+# Skip the whole run (and the slow Excel reads) if the output was written after
+# every input file (Excel file or its Parquet copy) was last changed.
+input_mtimes = [
+    path.stat().st_mtime
+    for file_name in input_files
+    for path in (script_dir / file_name, (script_dir / file_name).with_suffix('.parquet'))
+    if path.exists()
+]
+if input_mtimes and output_file_path.exists() and output_file_path.stat().st_mtime > max(input_mtimes):
+    print(f"⏭️ '{output_filename}' is up-to-date with the input files, nothing to do.")
+    sys.exit()
+
 # ==============================================================================
 # Step 1: Load All Excel Files
 # ==============================================================================
 for file_name in input_files:
     input_file_path = script_dir / file_name
+    # The filtering steps also write a Parquet copy of each file, which loads much faster;
+    # it is used unless the Excel file has been changed after it was written
+    parquet_file_path = input_file_path.with_suffix('.parquet')
     try:
-        # Load the data using pd.read_excel() since the input files are .xlsx.
-        df = pd.read_excel(input_file_path)
+        if parquet_file_path.exists() and (
+            not input_file_path.exists()
+            or parquet_file_path.stat().st_mtime >= input_file_path.stat().st_mtime
+        ):
+            df = pd.read_parquet(parquet_file_path)
+        else:
+            # Load the data using pd.read_excel() since the input files are .xlsx.
+            # Columns mixing numbers and text become strings, as in the Parquet copy.
+            df = pd.read_excel(input_file_path)
+            df = df.astype({column: 'string' for column, dtype in df.dtypes.items() if dtype == object})
         all_dataframes.append(df)
         print(f"✔️ Successfully loaded file '{file_name}' ({len(df)} rows).")
     except FileNotFoundError:
@@ -60,14 +84,27 @@ else:
     if id_column not in combined_df.columns:
         print(f"⚠️ ERROR: The specified ID column '{id_column}' could not be found.")
     else:
+        # Hash and sort the IDs as Arrow-backed strings (also unifies IDs read as numbers in one file).
+        combined_df[id_column] = combined_df[id_column].astype('string[pyarrow]')
+        
         # Drop rows where the unique ID is missing (required for effective grouping).
         combined_df.dropna(subset=[id_column], inplace=True)
         
         print(f"Deduplicating based on the ID column '{id_column}'...")
         
-        # Group by the ID column and aggregate using the 'first' non-NaN value found
-        # for each column within the group. 'as_index=False' keeps 't1' as a column.
-        cleaned_df = combined_df.groupby(id_column, as_index=False).agg('first')
+        # IDs that occur only once are kept as they are (one hash pass over the ID column);
+        # only the duplicated IDs need the groupby.
+        is_duplicate = combined_df.duplicated(subset=[id_column], keep=False)
+        
+        # Group the duplicated IDs by the ID column and aggregate using the 'first' non-NaN
+        # value found for each column within the group. 'as_index=False' keeps 't1' as a column.
+        merged_duplicates = combined_df[is_duplicate].groupby(id_column, as_index=False).agg('first')
+        
+        # Recombine, sorted by ID like a groupby over all rows
+        cleaned_df = (
+            pd.concat([combined_df[~is_duplicate], merged_duplicates], ignore_index=True)
+            .sort_values(id_column, kind='stable', ignore_index=True)
+        )
 
         # ==============================================================================
         # Step 4: Save the Result as CSV
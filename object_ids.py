@@ -0,0 +1,12 @@
+def id_prefix(name: str, parts: int) -> str:
+    """
+    Returns the first `parts` hyphen-separated parts of name (e.g., 'A-B-C-D-1.jpg', 4 -> 'A-B-C-D'),
+    or the whole name if it has fewer. Object IDs are taken from image file names this way:
+    4 parts identify an object's image group, 3 parts its row in the metadata CSV.
+    """
+    end = -1
+    for _ in range(parts):
+        end = name.find('-', end + 1)
+        if end < 0:
+            return name
+    return name[:end]